@@ -0,0 +1,165 @@
+# -*- coding: UTF-8 -*-
+"""损耗计算热点路径的benchmark，每个case的输入都是固定的。
+
+用benchmark装饰器注册case，被装饰的函数负责准备数据，返回需要计时的无参函数；
+需要清理的case可以写成生成器，yield需要计时的函数，yield之后的代码在计时结束之后执行
+"""
+import itertools
+import subprocess
+import os
+import sys
+import warnings
+import numpy as np
+
+sys.path.insert(0,os.path.join(os.path.dirname(__file__),'..'))
+warnings.filterwarnings('ignore')
+
+from power_toys.components.mosfet.base_mosfet import MOSFET
+from power_toys.components.inductor.coilcraft import Coilcraft
+from power_toys.components.waveform import Waveform
+from power_toys.curve import Curve
+from power_toys.topology.buck import BUCK
+from power_toys.topology.dcx import DCX
+
+BENCHMARKS = {}
+
+def benchmark(name,number = 10):
+    """注册benchmark
+
+    Args:
+        name (str): benchmark的名字，也是baseline中的键
+        number (int, optional): 每次计时调用的次数. Defaults to 10.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = {'setup':setup,'number':number}
+        return setup
+    return decorator
+
+def get_buck(fs = 100e3):
+    mos1 = MOSFET.load_from_lib("BSC030N08NS5")
+    mos2 = MOSFET.load_from_lib("BSC030N08NS5")
+    ind = Coilcraft(id='XGL6060-103')
+    return BUCK(vin=48,vo=12,Ncell = 2,q_active=mos1,q_passive=mos2,ind=ind,fs = fs,po = 110)
+
+@benchmark('buck_total_loss',number = 100)
+def bench_buck_total_loss():
+    buck = get_buck()
+    # 每次调用换一个fs，避免命中工作点缓存
+    fs_cycle = itertools.cycle([100e3,101e3])
+    def run():
+        buck.set_fs(next(fs_cycle))
+        return buck.total_loss
+    return run
+
+@benchmark('buck_total_loss_vectorized',number = 10)
+def bench_buck_total_loss_vectorized():
+    buck = get_buck(fs = np.linspace(50e3,500e3,100000))
+    fs_cycle = itertools.cycle([np.linspace(50e3,500e3,100000),np.linspace(51e3,501e3,100000)])
+    def run():
+        buck.set_fs(next(fs_cycle))
+        return buck.total_loss
+    return run
+
+@benchmark('buck_optimize_eff_by_fs',number = 1)
+def bench_buck_optimize_eff_by_fs():
+    buck = get_buck()
+    return lambda:buck.optimize_eff_by_fs
+
+@benchmark('buck_optimize_eff_by_rdson',number = 1)
+def bench_buck_optimize_eff_by_rdson():
+    buck = get_buck()
+    return lambda:buck.optimize_eff_by_rdson
+
+@benchmark('mosfet_opt_rdson',number = 10)
+def bench_mosfet_opt_rdson():
+    buck = get_buck()
+    return lambda:buck.mos1.opt_rdson
+
+@benchmark('mosfet_load_from_lib',number = 100)
+def bench_mosfet_load_from_lib():
+    return lambda:MOSFET.load_from_lib("BSC030N08NS5")
+
+@benchmark('coilcraft_predict_AI',number = 100)
+def bench_coilcraft_predict_AI():
+    ind = Coilcraft(id='XGL6060-103')
+    return lambda:ind.predict_AI(5,3,500e3)
+
+@benchmark('coilcraft_predict_loss',number = 10)
+def bench_coilcraft_predict_loss():
+    ind = Coilcraft(id='XGL6060-103')
+    return lambda:ind.predict_loss(5,3,500e3)
+
+@benchmark('coilcraft_predict_loss_batch',number = 10)
+def bench_coilcraft_predict_loss_batch():
+    ind = Coilcraft(id='XGL6060-103')
+    dc = np.linspace(0.5,5,1000)
+    return lambda:ind.predict_loss(dc,3,500e3)
+
+@benchmark('coilcraft_catalog_predict_AI',number = 100)
+def bench_coilcraft_catalog_predict_AI():
+    from power_toys.components.inductor.catalog import CoilcraftCatalog
+    catalog = CoilcraftCatalog.default()
+    return lambda:catalog.predict_AI(5,3,500e3)
+
+@benchmark('coilcraft_get_loss_cached',number = 100)
+def bench_coilcraft_get_loss_cached():
+    # 本地的接口和临时的缓存目录，重复的请求直接从缓存读取，计时结束之后关闭接口，恢复环境变量
+    import tempfile
+    from unittest import mock
+    from power_toys.components.inductor.coilcraft_server import CoilcraftServer
+    ind = Coilcraft(id='XGL6060-103')
+    with CoilcraftServer() as server,tempfile.TemporaryDirectory() as cache_dir:
+        with mock.patch.dict(os.environ,{'POWER_TOYS_COILCRAFT_URL':server.url,'POWER_TOYS_COILCRAFT_CACHE':cache_dir}):
+            yield lambda:ind.get_loss_by_ripple(5,1,3,500e3)
+
+@benchmark('dcx_total_loss',number = 100)
+def bench_dcx_total_loss():
+    mos = MOSFET.load_from_lib('BSC030N08NS5')
+    dcx = DCX(48,12,4,1e6,mos,mos,50e-9,100,DCX.HALF_BRIDGE)
+    fs_cycle = itertools.cycle([1e6,1.01e6])
+    def run():
+        dcx.set_fs(next(fs_cycle))
+        return dcx.total_loss
+    return run
+
+@benchmark('waveform_integral',number = 100)
+def bench_waveform_integral():
+    wave = Waveform.gen_sine(np.linspace(0,1e-5,100000),1e-5,1)
+    def run():
+        return wave.integral,wave.integral_range(5e-6,1e-6),wave.energy_equivalent(5e-6,1e-6)
+    return run
+
+@benchmark('curve_energy_equivalent',number = 1000)
+def bench_curve_energy_equivalent():
+    curve = Curve().load_from_file(os.path.join(os.path.dirname(__file__),'../power_toys/data/curve/epc2032_coss.txt'))
+    return lambda:curve.energy_equivalent(40)
+
+def dense_front(n,d = 4,seed = 0):
+    # 单位球面在第一象限的部分上的点互不支配，所有点都在前沿上
+    costs = np.abs(np.random.default_rng(seed).normal(size=(n,d)))
+    return costs/np.linalg.norm(costs,axis=1,keepdims=True)
+
+@benchmark('pareto_mask_dense',number = 1)
+def bench_pareto_mask_dense():
+    from power_toys.sweep.pareto import pareto_mask
+    costs = dense_front(20000)
+    return lambda:pareto_mask(costs)
+
+@benchmark('pareto_front_insert_dense',number = 1)
+def bench_pareto_front_insert_dense():
+    import pandas as pd
+    from power_toys.sweep.pareto import ParetoFront
+    data = pd.DataFrame(dense_front(20000),columns=['efficiency','volume','area','price'])
+    data['efficiency'] = -data['efficiency']
+    def run():
+        front = ParetoFront()
+        for i in range(0,len(data),2000):
+            front.insert(data.iloc[i:i+2000])
+        return front
+    return run
+
+@benchmark('import_buck',number = 1)
+def bench_import_buck():
+    # 在新的进程中import，包含python解释器启动的时间
+    root = os.path.join(os.path.dirname(__file__),'..')
+    return lambda:subprocess.run([sys.executable,'-c','import power_toys.topology.buck'],cwd=root,check=True)
@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+"""运行benchmark，并和保存的baseline比较
+
+    python benchmarks/run.py                  # 和baseline比较，变慢超过阈值时返回1
+    python benchmarks/run.py --save           # 保存当前的结果为baseline
+    python benchmarks/run.py -k buck -t 0.5   # 只运行名字中含有buck的case，阈值为50%
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import timeit
+from cases import BENCHMARKS
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__),'baseline.json')
+
+def run_benchmark(name,repeat = 5):
+    """运行一个benchmark，返回每次调用的最短时间
+
+    Args:
+        name (str): benchmark的名字
+        repeat (int, optional): 重复计时的次数. Defaults to 5.
+
+    Returns:
+        float: 每次调用的时间，单位为s
+    """
+    case = BENCHMARKS[name]
+    func = case['setup']()
+    # setup也可以是生成器，yield需要计时的函数，计时结束之后继续执行yield之后的清理
+    teardown = None
+    if(inspect.isgenerator(func)):
+        teardown = func
+        func = next(teardown)
+    try:
+        # 预热，载入模型等只在第一次调用时发生
+        func()
+        times = timeit.repeat(func,number=case['number'],repeat=repeat)
+    finally:
+        if(teardown is not None):
+            next(teardown,None)
+    return min(times)/case['number']
+
+def compare(result,baseline,threshold):
+    """和baseline比较
+
+    Args:
+        result (dict): {name:time}
+        baseline (dict): {name:time}
+        threshold (float): 允许变慢的比例，0.2表示慢20%以内都不算退化
+
+    Returns:
+        list: 退化的benchmark的名字
+    """
+    regressions = []
+    for name,t in result.items():
+        if(name not in baseline):
+            print(f"{name:<32}{t*1e3:>12.3f}ms{'':>12}  (no baseline)")
+            continue
+        ratio = t/baseline[name]
+        flag = ''
+        if(ratio > 1+threshold):
+            flag = 'REGRESSION'
+            regressions.append(name)
+        print(f"{name:<32}{t*1e3:>12.3f}ms{ratio:>11.2f}x  {flag}")
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='power_toys benchmark')
+    parser.add_argument('-k',dest='keyword',default='',help='只运行名字中含有keyword的case')
+    parser.add_argument('-t','--threshold',type=float,default=0.2,help='允许变慢的比例')
+    parser.add_argument('-r','--repeat',type=int,default=5,help='重复计时的次数')
+    parser.add_argument('--baseline',default=BASELINE_FILE,help='baseline文件')
+    parser.add_argument('--save',action='store_true',help='保存结果为baseline')
+    args = parser.parse_args(argv)
+
+    result = {}
+    for name in BENCHMARKS:
+        if(args.keyword in name):
+            result[name] = run_benchmark(name,args.repeat)
+
+    baseline = {}
+    if(os.path.exists(args.baseline)):
+        with open(args.baseline,'r') as f:
+            baseline = json.load(f)
+
+    if(args.save):
+        baseline.update(result)
+        with open(args.baseline,'w') as f:
+            json.dump(baseline,f,indent=4)
+        for name,t in result.items():
+            print(f"{name:<32}{t*1e3:>12.3f}ms")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(result,baseline,args.threshold)
+    if(regressions):
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,11 +20,9 @@ b = BUCK(48,12,mos1,mos2,ind,500e3,100)
 # plt.plot(po,eff)
 # plt.show()
 
-# 扫描频率
-eff = []
+# 扫描频率，fs为数组时一次算出所有频率下的效率
 fs = np.linspace(10e3,500e3,100)
-for f in fs:
-    b.set_fs(f)
-    eff.append(b.efficiency)
+b.set_fs(fs)
+eff = b.efficiency
 plt.plot(fs,eff)
 plt.show()
@@ -6,18 +6,19 @@ import numpy as np
 import os
 import joblib
 from power_toys.ml_model.fc_net import FC_Net
+from power_toys.data.loss_store import LossStore
 # 加载数据
-file_list = os.listdir('./power_toys/data/coilcraft_loss_for_training_more_data')
-ind_id_list  = [x[:-4] for x in file_list]
+store = LossStore.open('more_data')
+ind_id_list  = store.ids
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 print(f'Running on {device}')
 
 # ind_id_list = ['XGL5030-223']
 for idx,ind_id in enumerate(ind_id_list):
-    data = pd.read_csv(f"./power_toys/data/coilcraft_loss_for_training_more_data/{ind_id}.txt", header=None)
-    data = data[data[5]<200]
-    X = data.iloc[:, 0:3].values  # 输入值
-    y = data.iloc[:, 3:6].values  # 输出值
+    data = store[ind_id]
+    data = data[data[:,5]<200]
+    X = data[:, 0:3]  # 输入值
+    y = data[:, 3:6]  # 输出值
 
     # 数据标准化
     X_scaler = StandardScaler().fit(X)
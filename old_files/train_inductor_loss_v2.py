@@ -6,15 +6,17 @@ import numpy as np
 import os
 import joblib
 from power_toys.ml_model.fc_net import FC_Net
+from power_toys.data.loss_store import LossStore
 
 # 加载数据
-file_list = os.listdir('./power_toys/data/combined_more_loss_for_training')
+store = LossStore.open('combined_more')
+file_list = store.ids
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 print(f'Running on {device}')
 
 # ind_id_list = ['XGL5030-223']
 for idx,ind_id in enumerate(file_list):
-    data = pd.read_csv(f"./power_toys/data/combined_more_loss_for_training/{ind_id}", header=None)
+    data = pd.DataFrame(store[ind_id])
     # shuffle data
     data = data.sample(frac=1).reset_index(drop=True)
 
@@ -46,7 +48,7 @@ for idx,ind_id in enumerate(file_list):
         if(loss.item()<0.0001):
             break
 
-    torch.save(net.state_dict(), f'./power_toys/data/combined_more_trained_model/{ind_id[:-4]}.pth')
-    joblib.dump(X_scaler, f'./power_toys/data/combined_more_trained_model/{ind_id[:-4]}_x_scaler.pkl')
-    joblib.dump(y_scaler, f'./power_toys/data/combined_more_trained_model/{ind_id[:-4]}_y_scaler.pkl')
+    torch.save(net.state_dict(), f'./power_toys/data/combined_more_trained_model/{ind_id}.pth')
+    joblib.dump(X_scaler, f'./power_toys/data/combined_more_trained_model/{ind_id}_x_scaler.pkl')
+    joblib.dump(y_scaler, f'./power_toys/data/combined_more_trained_model/{ind_id}_y_scaler.pkl')
     print(f"{idx}/{len(file_list)} finished")
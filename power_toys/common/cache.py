@@ -0,0 +1,98 @@
+from collections import OrderedDict
+import threading
+
+class LRUCache():
+    """进程内共享的LRU缓存，用于缓存从硬盘载入的模型等数据，
+    通过hits和misses统计缓存的命中情况
+    """
+
+    def __init__(self,maxsize = 128) -> None:
+        """
+        Args:
+            maxsize (int, optional): 缓存的最大数量，None表示不限制. Defaults to 128.
+        """
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # 锁不能被拷贝或者pickle，拷贝出来的缓存是空的
+        return {'maxsize':self._maxsize}
+
+    def __setstate__(self,state):
+        self.__init__(maxsize=state['maxsize'])
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self,val):
+        with self._lock:
+            self._maxsize = val
+            self._evict()
+
+    def _evict(self):
+        if(self._maxsize is None):
+            return
+        while(len(self._data) > self._maxsize):
+            self._data.popitem(last=False)
+
+    def get(self,key,loader):
+        """获取缓存的数据，没有命中的时候调用loader(key)载入并缓存
+
+        Args:
+            key (hashable): 缓存的键
+            loader (callable): 载入数据的函数
+
+        Returns:
+            _type_: 缓存的数据
+        """
+        with self._lock:
+            if(key in self._data):
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            value = loader(key)
+            self._data[key] = value
+            self._evict()
+            return value
+
+    def __contains__(self,key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def invalidate(self):
+        """清空缓存的数据，保留命中统计
+        """
+        with self._lock:
+            self._data.clear()
+
+    def clear(self):
+        """清空缓存以及命中统计
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def info(self):
+        """缓存的统计信息
+
+        Returns:
+            dict: hits,misses,size,maxsize,hit_rate
+        """
+        total = self.hits+self.misses
+        return {
+            'hits':self.hits,
+            'misses':self.misses,
+            'size':len(self._data),
+            'maxsize':self._maxsize,
+            'hit_rate':self.hits/total if total else 0
+        }
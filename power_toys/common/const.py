@@ -7,4 +7,14 @@ class DCX_COMPONENT(object):
 class TWO_TER_TRANSFORMER(object):
     (PRIMARY_WINDING,SECONDARY_WINDING) = range(0,2)
 
-MAX_ITER_NUM = 100
\ No newline at end of file
+MAX_ITER_NUM = 100
+
+# MOSFET的ktemp为结温KTEMP_REF_TEMP(°C)时的Rdson相对于25°C的倍数
+KTEMP_REF_TEMP = 100
+# 铜的电阻温度系数(1/K)
+ALPHA_CU = 0.00393
+# 电热迭代中温度超过这个值(°C)就认为热失控
+THERMAL_RUNAWAY_TEMP = 300
+
+# MOSFET损耗计算需要用到的电路工作点参数
+OPERATING_POINT_PARAMS = ['irms','fs','on_voltage','on_current','off_voltage','off_current','qrr_voltage','cap_voltage']
\ No newline at end of file
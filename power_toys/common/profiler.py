@@ -0,0 +1,143 @@
+import functools
+from time import perf_counter
+
+# 当前开启的profiler，None表示没有开启，损耗计算不做任何记录
+active = None
+
+def component_label(comp):
+    """元件在profiler中的名字，比如MOSFET:BSC030N08NS5[0]
+
+    Args:
+        comp (BaseComponent): 元件
+
+    Returns:
+        str: 元件的名字
+    """
+    name = type(comp).__name__
+    comp_id = getattr(comp,'id',None)
+    if(comp_id):
+        name = f"{name}:{comp_id}"
+    return f"{name}[{comp.circuit_idx}]"
+
+def get_loss(comp,loss_name):
+    """获取元件的一项损耗，开启profiler的时候记录耗时
+
+    Args:
+        comp (BaseComponent): 元件
+        loss_name (str): 损耗名称
+
+    Returns:
+        float: 损耗
+    """
+    prof = active
+    if(prof is None):
+        return getattr(comp,loss_name)
+    prof.push(('component',component_label(comp)))
+    prof.push(('loss',loss_name))
+    try:
+        return getattr(comp,loss_name)
+    finally:
+        prof.pop()
+        prof.pop()
+
+def circuit_frame(func):
+    """装饰BaseCircuit的损耗计算方法，开启profiler的时候把电路记录为一层调用
+    """
+    @functools.wraps(func)
+    def wrapper(self,*args,**kwargs):
+        prof = active
+        if(prof is None):
+            return func(self,*args,**kwargs)
+        prof.push(('circuit',type(self).__name__))
+        try:
+            return func(self,*args,**kwargs)
+        finally:
+            prof.pop()
+    return wrapper
+
+class LossProfiler():
+    """损耗计算的profiler，记录每一项损耗的耗时、每个电路参数的调用次数以及每个元件的总耗时，
+    默认关闭，只在with内部记录
+
+    >>> with LossProfiler() as prof:
+    ...     buck.total_loss
+    >>> prof.to_dict()
+    >>> prof.save_folded('loss.folded')
+    """
+
+    def __init__(self) -> None:
+        self._previous = None
+        self.reset()
+
+    def reset(self):
+        """清空记录
+        """
+        # {调用路径:[调用次数,总耗时,子调用耗时]}，调用路径是由(kind,name)组成的tuple
+        self.stats = {}
+        self._stack = []
+
+    def __enter__(self):
+        global active
+        self._previous = active
+        active = self
+        return self
+
+    def __exit__(self,*args):
+        global active
+        active = self._previous
+
+    def push(self,frame):
+        self._stack.append((frame,perf_counter()))
+
+    def pop(self):
+        frame,t0 = self._stack.pop()
+        elapsed = perf_counter()-t0
+        path = tuple(f for f,_ in self._stack)+(frame,)
+        stat = self.stats.setdefault(path,[0,0.0,0.0])
+        stat[0] += 1
+        stat[1] += elapsed
+        if(self._stack):
+            self.stats.setdefault(path[:-1],[0,0.0,0.0])[2] += elapsed
+
+    def to_dict(self):
+        """汇总记录
+
+        Returns:
+            dict: loss_terms为每个元件每一项损耗的调用次数和耗时，params为每个电路参数的调用次数和耗时，
+            components为每个元件的损耗计算总耗时，单位都是s
+        """
+        result = {'loss_terms':{},'params':{},'components':{}}
+        for path,(calls,total,_) in self.stats.items():
+            kind,name = path[-1]
+            if(kind == 'loss'):
+                component = path[-2][1]
+                item = result['loss_terms'].setdefault(f"{component}.{name}",{'calls':0,'time':0.0})
+                item['calls'] += calls
+                item['time'] += total
+                result['components'][component] = result['components'].get(component,0.0)+total
+            elif(kind == 'param'):
+                item = result['params'].setdefault(name,{'calls':0,'time':0.0})
+                item['calls'] += calls
+                item['time'] += total
+        return result
+
+    def folded(self):
+        """flame graph使用的folded stack格式，每一行为"frame1;frame2;... 耗时(us)"，耗时为不含子调用的时间
+
+        Returns:
+            list: 每一行的字符串
+        """
+        lines = []
+        for path,(calls,total,children) in self.stats.items():
+            self_time = max(total-children,0)
+            lines.append(f"{';'.join(name for _,name in path)} {int(round(self_time*1e6))}")
+        return lines
+
+    def save_folded(self,path):
+        """保存为folded stack文件，可以直接用flamegraph.pl或者speedscope打开
+
+        Args:
+            path (str): 文件路径
+        """
+        with open(path,'w') as f:
+            f.write('\n'.join(self.folded())+'\n')
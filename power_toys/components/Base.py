@@ -1,21 +1,66 @@
 import numpy as np
+from contextlib import contextmanager
+from ..common.cache import LRUCache
+from ..common import profiler
+from ..common.const import OPERATING_POINT_PARAMS,MAX_ITER_NUM,THERMAL_RUNAWAY_TEMP
+
+def as_param(val):
+    """将电路参数转换为可以广播的形式，list和tuple转换为numpy数组，标量保持不变
+
+    Args:
+        val (float|list|np.ndarray): 电路参数
+
+    Returns:
+        float|np.ndarray: 用于批量计算的参数
+    """
+    if(isinstance(val,(list,tuple))):
+        return np.asarray(val,dtype=float)
+    return val
 
 class BaseComponent():
     """
     所有component的基类，具备通用的属性和方法，通过继承这个类来继承属性
     """
+    # 热阻(K/W)，为None的元件不参与电热计算
+    rth = None
+    _thermal_temp = None
 
     def __init__(self) -> None:
         self.circuit_idx = -1
         self.quantity = 0
 
+    def __setattr__(self,name,value):
+        super().__setattr__(name,value)
+        # 元件的参数可能会影响电路的工作点，比如电感的感值会影响纹波，所以需要让电路的缓存失效
+        if(not name.startswith('_')):
+            circuit = self.__dict__.get('circuit')
+            if(circuit is not None):
+                circuit.invalidate_param_cache()
+
     def register_circuit(self,circuit):
         self.circuit = circuit
     
     def circuit_param(self,param_name):
         if(hasattr(self,'circuit')):
-            return self.circuit.param(component = self,param_name = param_name)
+            prof = profiler.active
+            if(prof is None):
+                return self.circuit.param(component = self,param_name = param_name)
+            prof.push(('param',param_name))
+            try:
+                return self.circuit.param(component = self,param_name = param_name)
+            finally:
+                prof.pop()
         
+    @property
+    def thermal_temp(self):
+        """BaseCircuit.solve_thermal求得的元件温度(°C)，为None时损耗按元件的标称参数计算
+        """
+        return self._thermal_temp
+
+    @thermal_temp.setter
+    def thermal_temp(self,val):
+        self._thermal_temp = val
+
     @property
     def circuit_idx(self):
         return self._circuit_idx
@@ -37,11 +82,13 @@ class BaseComponent():
         loss_list = self.loss_list
         loss_sum = 0
         for loss_name in loss_list:
-            loss_sum += getattr(self,loss_name)
+            loss_sum += profiler.get_loss(self,loss_name)
         return loss_sum
 
 class BaseCircuit():
     def __init__(self) -> None:
+        # 工作点的缓存，以(param_name,c_index)为键，电路的任何属性被修改都会使缓存失效
+        self._param_cache = LRUCache(maxsize=None)
         self.component_list = []
         # 元件数量，比如全桥电路中4个管子是相同的，就用4来记录有4个一样的管子
         self.po = 0
@@ -70,18 +117,84 @@ class BaseCircuit():
         component.quantity = quantity
         self.component_list.append(component)
     
+    def __setattr__(self,name,value):
+        super().__setattr__(name,value)
+        # vin,vo,po,_fs,register_component等改变了电路的状态，工作点缓存失效
+        if(name != '_param_cache' and '_param_cache' in self.__dict__):
+            self._param_cache.invalidate()
+
     def param(self,component:BaseComponent,param_name):
         func = getattr(self, param_name, None)
         if func is not None and callable(func):
-            return func(c_index=component.circuit_idx)
+            c_index = component.circuit_idx
+            return self._param_cache.get((param_name,c_index),lambda key:func(c_index=c_index))
         else:
             raise ValueError(f"No such method: {param_name}")
+
+    def operating_point(self,c_index):
+        """获取c_index位置上mos的工作点，不需要在该位置注册元件（工作点和mos本身的参数无关的时候）
+
+        Args:
+            c_index (int): 元件标识
+
+        Returns:
+            dict: irms,fs,on_voltage,on_current,off_voltage,off_current,qrr_voltage,cap_voltage
+        """
+        return {param_name:self._param_cache.get((param_name,c_index),lambda key:getattr(self,param_name)(c_index=c_index)) for param_name in OPERATING_POINT_PARAMS}
+
+    @contextmanager
+    def variant(self,fs = None,components = None):
+        """不拷贝电路，临时修改电路的fs或者替换元件，退出with之后恢复原来的状态。
+        with内部也可以直接调用set_fs,register_component等修改电路，退出时同样会被恢复
+
+        >>> with buck.variant(fs = 200e3):
+        ...     loss = buck.total_loss
+
+        Args:
+            fs (Hz, optional): 临时的开关频率. Defaults to None.
+            components (dict, optional): {c_index:component}，临时替换的元件，数量和被替换的元件相同. Defaults to None.
+
+        Yields:
+            BaseCircuit: 电路本身
+        """
+        state = dict(self.__dict__)
+        state['component_list'] = list(self.component_list)
+        component_state = [(comp,comp.circuit,comp.circuit_idx,comp.quantity) for comp in self.component_list]
+        try:
+            if(fs is not None):
+                self.set_fs(fs)
+            if(components):
+                for c_index,comp in components.items():
+                    self.register_component(comp,c_index,self.get_component(c_index).quantity)
+            yield self
+        finally:
+            for comp,circuit,circuit_idx,quantity in component_state:
+                comp.circuit = circuit
+                comp.circuit_idx = circuit_idx
+                comp.quantity = quantity
+            self.__dict__.clear()
+            self.__dict__.update(state)
+            self.invalidate_param_cache()
+
+    def invalidate_param_cache(self):
+        """手动使工作点缓存失效，比如直接修改了元件的参数
+        """
+        self._param_cache.invalidate()
+
+    @property
+    def param_cache_info(self):
+        """工作点缓存的命中统计
+
+        Returns:
+            dict: hits,misses,size,maxsize,hit_rate
+        """
+        return self._param_cache.info
     
     def fs(self,c_index):
         return self._fs
         
     def set_fs(self,val):
-        self._fs = val
+        self._fs = as_param(val)
 
     def loss_sum_on_component(self,comp:BaseComponent):
         """获取电路中元件的损耗
@@ -104,11 +217,12 @@ class BaseCircuit():
         """
 
         if(loss_name in comp.loss_list):
-            return getattr(comp,loss_name)*comp.quantity
+            return profiler.get_loss(comp,loss_name)*comp.quantity
         else:
             print("invalid loss name")
             return 0
     
+    @profiler.circuit_frame
     def loss_on_component(self,comp:BaseComponent):
         result = {
             'quantity':comp.quantity,
@@ -117,11 +231,12 @@ class BaseCircuit():
 
         for loss_name in comp.loss_list:
             # 获取元件数量
-            result['loss_breakdown'][loss_name] = getattr(comp,loss_name)
+            result['loss_breakdown'][loss_name] = profiler.get_loss(comp,loss_name)
         return result
             
     
     @property
+    @profiler.circuit_frame
     def total_loss(self):
         """
         获取所有元件的损耗，需要注意的是component_list中每个item的第一个元素是component，第二个是quantity
@@ -132,9 +247,90 @@ class BaseCircuit():
             loss_list = comp.loss_list
             for loss_name in loss_list:
                 # 遍历所有损耗类型
-                loss_sum += getattr(comp,loss_name)*comp.quantity
+                loss_sum += profiler.get_loss(comp,loss_name)*comp.quantity
         return loss_sum
     
+    @property
+    @profiler.circuit_frame
+    def loss_breakdown(self):
+        """获取所有元件的损耗明细，损耗已经乘以元件数量。批量模式下每一项都是数组
+
+        Returns:
+            dict: {circuit_idx:{loss_name:loss}}
+        """
+        result = {}
+        for comp in self.component_list:
+            result[comp.circuit_idx] = {}
+            for loss_name in comp.loss_list:
+                result[comp.circuit_idx][loss_name] = profiler.get_loss(comp,loss_name)*comp.quantity
+        return result
+
+    def solve_thermal(self,t_amb = 25,rth = None,tol = 1e-3,max_iter = MAX_ITER_NUM):
+        """电热耦合求解。元件的温度为t_amb+rth*单个元件的损耗，而损耗又和温度有关（MOSFET的Rdson，电感的DCR），
+        用Steffensen加速的不动点迭代求解，批量模式下所有工作点一起迭代，一般只需要几次损耗计算。
+        求解之后元件的thermal_temp为求得的温度，之后的损耗和效率都按这个温度计算，调用clear_thermal恢复
+
+        >>> buck.solve_thermal(t_amb = 40,rth = {BUCK_COMPONENT.ACTIVE_MOS:30,BUCK_COMPONENT.PASSIVE_MOS:30})
+        >>> buck.efficiency
+
+        Args:
+            t_amb (°C, optional): 环境温度，可以是数组. Defaults to 25.
+            rth (dict, optional): {c_index:热阻(K/W)}，覆盖元件自身的rth. Defaults to None.
+            tol (°C, optional): 收敛的温度误差. Defaults to 1e-3.
+            max_iter (int, optional): 最大迭代次数. Defaults to MAX_ITER_NUM.
+
+        Returns:
+            dict: {c_index:温度}，热失控（不存在不动点）的工作点为nan
+        """
+        rth = rth or {}
+        self.clear_thermal()
+        comps = []
+        rth_list = []
+        for comp in self.component_list:
+            comp_rth = rth.get(comp.circuit_idx,comp.rth)
+            if(comp_rth is not None):
+                comps.append(comp)
+                rth_list.append(comp_rth)
+
+        def iterate(temps):
+            # 温度不影响电路的工作点，直接修改_thermal_temp，不让工作点缓存失效
+            for comp,temp in zip(comps,temps):
+                comp._thermal_temp = temp
+            temps_new = []
+            for comp,comp_rth in zip(comps,rth_list):
+                temp = np.asarray(t_amb+comp_rth*comp.total_loss,dtype=float)
+                temps_new.append(np.where(temp > THERMAL_RUNAWAY_TEMP,np.nan,temp))
+            return temps_new
+
+        temps = iterate([t_amb]*len(comps))
+        for cnt_iter in range(max_iter):
+            temps_1 = iterate(temps)
+            err = max([np.max(np.nan_to_num(np.abs(t1-t0)),initial=0) for t0,t1 in zip(temps,temps_1)]+[0])
+            if(err < tol):
+                temps = temps_1
+                break
+            temps_2 = iterate(temps_1)
+            temps_new = []
+            for t0,t1,t2 in zip(temps,temps_1,temps_2):
+                # Aitken外推，分母为0或者外推到环境温度以下（热失控时的不稳定解）的时候退回普通迭代
+                denom = t2-2*t1+t0
+                with np.errstate(divide='ignore',invalid='ignore'):
+                    t_acc = t0-np.power(t1-t0,2)/denom
+                valid = np.isfinite(t_acc)&(np.abs(denom) > 1e-12)&(t_acc >= t_amb)&(t_acc <= THERMAL_RUNAWAY_TEMP)
+                temps_new.append(np.where(valid,t_acc,t2))
+            temps = temps_new
+        else:
+            print(f"{max_iter}次迭代后，不收敛")
+        for comp,temp in zip(comps,temps):
+            comp.thermal_temp = temp[()]
+        return {comp.circuit_idx:comp.thermal_temp for comp in comps}
+
+    def clear_thermal(self):
+        """清除solve_thermal的结果，损耗恢复按元件的标称参数计算
+        """
+        for comp in self.component_list:
+            comp.thermal_temp = None
+
     @property
     def efficiency(self):
         return self.po/(self.po+self.total_loss)
@@ -1,5 +1,3 @@
-import pyaedt
-from pyaedt.maxwell import Maxwell3d
 import os
 
 class ModelFace():
@@ -167,6 +165,7 @@ class Ansys():
             Maxwell3D: 返回self.m3d的操作对象
         """
         non_graphical = False
+        import pyaedt
         self.m3d = pyaedt.Maxwell3d(
             projectname=proj_name,
             designname=design_name,
@@ -1,11 +1,6 @@
 import numpy as np
 import os
 import json
-import requests
-from scipy.interpolate import griddata
-import torch
-import torch.nn as nn
-import joblib
 from ..Base import BaseComponent
 
 class BaseInductor(BaseComponent):
@@ -13,6 +8,11 @@ class BaseInductor(BaseComponent):
     def __init__(self) -> None:
         super().__init__()
         self._inductance = 0
+
+    @property
+    def loss_list(self):
+        # 理想电感，没有损耗
+        return []
         
     @property
     def inductance(self):
@@ -0,0 +1,266 @@
+# -*- coding: UTF-8 -*-
+
+import os
+import numpy as np
+from ...data import snapshot
+from ...common.cache import LRUCache
+from ...log import log_error
+
+_root_path = os.path.dirname(__file__)
+# 由data/coilcraft_model生成的索引，电感模型有变化的时候自动重新生成
+INDEX_FILE = f"{_root_path}/../../data/coilcraft_model_index.npz"
+
+# 进程内共享的catalog，第一次使用的时候载入
+_default_catalog = None
+
+def _load_stacked_model(ids):
+    """把每个型号的损耗模型叠加成一个StackedMLP，没有导出npz的型号从torch的模型转换
+
+    Args:
+        ids (tuple): 型号
+
+    Returns:
+        StackedMLP: 网络
+    """
+    from ...ml_model.numpy_net import NumpyMLP,StackedMLP
+    from .coilcraft import model_registry,_load_AI_model
+    nets = []
+    for _id in ids:
+        net = model_registry.get(_id,_load_AI_model)
+        nets.append(net if isinstance(net,NumpyMLP) else net.to_numpy())
+    return StackedMLP(nets)
+
+# 叠加之后的模型的缓存，以型号的tuple为键
+stacked_registry = LRUCache(maxsize=8)
+
+class CoilcraftCatalog():
+    """Coilcraft电感的索引，data/coilcraft_model中所有电感的参数（系列，感值，Isat，DCR，尺寸，价格，Steinmetz参数等）
+    保存在一个numpy的结构化数组中，列名和json模型中的键相同，按系列和感值筛选不需要逐个读取json
+
+    >>> catalog = CoilcraftCatalog.default()
+    >>> selected = catalog.select(series = 'XAL5030',inductance_min = 1e-6,inductance_max = 5e-6)
+    >>> ind = selected.device(0)
+    """
+
+    def __init__(self,data:np.ndarray) -> None:
+        self.data = data
+
+    @classmethod
+    def build(cls):
+        """读取data/coilcraft_model中所有的json生成索引
+
+        Returns:
+            CoilcraftCatalog: catalog
+        """
+        return cls(snapshot.coilcraft_arrays()['coilcraft'])
+
+    @classmethod
+    def load(cls):
+        """载入保存的索引，索引不存在或者电感模型有变化的时候重新生成并保存
+
+        Returns:
+            CoilcraftCatalog: catalog
+        """
+        import zipfile
+        import threading
+        fingerprint = snapshot.dir_fingerprint(snapshot.COILCRAFT_MODEL_DIR)
+        if(os.path.exists(INDEX_FILE)):
+            try:
+                with np.load(INDEX_FILE) as index:
+                    if(str(index['fingerprint']) == fingerprint):
+                        return cls(index['data'])
+            except (OSError,ValueError,KeyError,EOFError,zipfile.BadZipFile):
+                # 索引损坏的时候重新生成
+                pass
+        catalog = cls.build()
+        # 先写临时文件再替换，多个进程同时生成索引的时候其他进程不会读到写了一半的索引
+        tmp_path = f"{INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path,'wb') as f:
+                np.savez(f,data=catalog.data,fingerprint=np.array(fingerprint))
+            os.replace(tmp_path,INDEX_FILE)
+        except OSError:
+            # 安装目录不可写的时候只在内存中使用
+            pass
+        return catalog
+
+    @classmethod
+    def default(cls):
+        """进程内共享的catalog，使用快照的时候直接映射快照中的数组
+
+        Returns:
+            CoilcraftCatalog: catalog
+        """
+        global _default_catalog
+        if(_default_catalog is None):
+            snap = snapshot.active()
+            _default_catalog = cls(snap['coilcraft']) if snap is not None and 'coilcraft' in snap else cls.load()
+        return _default_catalog
+
+    @classmethod
+    def invalidate(cls):
+        global _default_catalog
+        _default_catalog = None
+
+    def __getattr__(self,name):
+        data = self.__dict__.get('data')
+        if(data is not None and name in data.dtype.names):
+            return data[name]
+        raise AttributeError(name)
+
+    def __getitem__(self,key):
+        """用bool数组或者序号数组筛选，返回新的catalog；用参数名返回参数的数组
+
+        Args:
+            key (str|np.ndarray|slice): 参数名或者筛选条件
+
+        Returns:
+            CoilcraftCatalog|np.ndarray: 筛选之后的catalog或者参数数组
+        """
+        if(isinstance(key,str)):
+            return self.data[key]
+        return CoilcraftCatalog(np.atleast_1d(self.data[key]))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.device(i)
+
+    def sort(self,*keys,descending = False):
+        idx = np.lexsort([self.data[key] for key in reversed(keys)])
+        if(descending):
+            idx = idx[::-1]
+        return self[idx]
+
+    @property
+    def ids(self):
+        return self.data['id']
+
+    @property
+    def series(self):
+        return np.char.upper(self.data['PhotoId'])
+
+    @property
+    def inductance(self):
+        return self.data['L']*1e-6
+
+    @property
+    def series_list(self):
+        """所有的系列，按字母排序
+
+        Returns:
+            list: 系列
+        """
+        return sorted(set(self.series.tolist()))
+
+    def select(self,series = None,inductance_min = None,inductance_max = None):
+        """按系列和感值范围筛选，结果按感值排序
+
+        Args:
+            series (str, optional): 系列，比如XAL5030，不区分大小写. Defaults to None.
+            inductance_min (H, optional): 最小感值. Defaults to None.
+            inductance_max (H, optional): 最大感值. Defaults to None.
+
+        Returns:
+            CoilcraftCatalog: 筛选之后的catalog
+        """
+        mask = np.ones(len(self),dtype=bool)
+        if(series is not None):
+            mask &= self.series == series.upper()
+        if(inductance_min is not None):
+            mask &= self.inductance >= inductance_min
+        if(inductance_max is not None):
+            mask &= self.inductance <= inductance_max
+        result = self[mask]
+        return result.sort('L')
+
+    def index(self,_id):
+        idx = np.flatnonzero(self.data['id'] == _id)
+        return int(idx[0]) if len(idx) else -1
+
+    def row(self,_id):
+        """获取型号对应的参数
+
+        Args:
+            _id (str): 型号
+
+        Returns:
+            np.void: 参数，不存在的时候返回None
+        """
+        i = self.index(_id)
+        if(i < 0):
+            return None
+        return self.data[i]
+
+    @property
+    def AI_model(self):
+        """catalog中所有电感的损耗模型叠加成的StackedMLP，从进程内的缓存中获取
+
+        Returns:
+            StackedMLP: 网络
+        """
+        return stacked_registry.get(tuple(self.ids.tolist()),_load_stacked_model)
+
+    def predict_AI(self,dc,ac,freq):
+        """catalog中所有电感在所有工作点下的损耗，所有型号的网络一起计算
+
+        Args:
+            dc (A): 直流电流，可以是数组
+            ac (A): 交流电流，可以是数组
+            freq (Hz): 频率，可以是数组
+
+        Returns:
+            np.ndarray: shape为(电感数,)+dc,ac,freq广播之后的shape+(3,)，最后一维为[DC损耗,AC损耗,温度]，
+            和逐个调用Coilcraft.predict_AI_batch的结果相同
+        """
+        dc,ac,freq = np.broadcast_arrays(dc,ac,freq)
+        shape = dc.shape
+        input_new = np.column_stack((dc.ravel(),ac.ravel(),freq.ravel()/1e6))
+        xyz_out = self.AI_model.predict(input_new)
+        return xyz_out.reshape((len(self),)+shape+(3,))
+
+    def rank(self,dc,ac,freq,top_k = None):
+        """按工作点下的总损耗给catalog中的电感排序
+
+        Args:
+            dc (A): 直流电流，只支持标量
+            ac (A): 交流电流，只支持标量
+            freq (Hz): 频率，只支持标量
+            top_k (int, optional): 只返回损耗最小的top_k个. Defaults to None，全部返回.
+
+        Returns:
+            pd.DataFrame: id,inductance,isat,loss_dc,loss_ac,temperature,total_loss,saturated，
+            按total_loss从小到大排序，饱和的电感排在最后；工作点不是标量时返回None
+        """
+        import pandas as pd
+        if(np.ndim(dc) > 0 or np.ndim(ac) > 0 or np.ndim(freq) > 0):
+            # 多个工作点的结果用predict_AI获取
+            log_error("rank只支持标量的工作点，多个工作点请使用predict_AI")
+            return None
+        result = self.predict_AI(dc,ac,freq)
+        result = pd.DataFrame({
+            'id':self.ids,
+            'inductance':self.inductance,
+            'isat':self.Isat,
+            'loss_dc':result[:,0],
+            'loss_ac':result[:,1],
+            'temperature':result[:,2],
+            'total_loss':result[:,0]+result[:,1],
+            'saturated':dc+ac/2 > self.Isat
+        })
+        result = result.sort_values(['saturated','total_loss'],ignore_index=True)
+        if(top_k is not None):
+            result = result.head(top_k)
+        return result
+
+    def device(self,i):
+        from .coilcraft import Coilcraft
+        return Coilcraft(str(self.data['id'][i]))
+
+    def get(self,_id):
+        if(self.index(_id) < 0):
+            return None
+        from .coilcraft import Coilcraft
+        return Coilcraft(_id)
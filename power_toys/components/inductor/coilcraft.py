@@ -1,31 +1,108 @@
 import numpy as np
 import os
 import json
-import requests
-from scipy.interpolate import griddata
-import torch
-import torch.nn as nn
-import joblib
 from .base_inductor import BaseInductor
+from ...common.cache import LRUCache
+from ...data import snapshot
+from ...common.const import ALPHA_CU
 
-class Net(nn.Module):
-    def __init__(self):
-        super(Net, self).__init__()
-        self.fc1 = nn.Linear(3, 50)
-        self.fc2 = nn.Linear(50, 50)
-        self.fc3 = nn.Linear(50, 3)
-
-    def forward(self, x):
-        x = torch.relu(self.fc1(x))
-        x = torch.relu(self.fc2(x))
-        x = self.fc3(x)
-        return x
+# torch,joblib,scipy和requests只在用到的时候才import，只用到电感参数的时候不需要载入
+def __getattr__(name):
+    # 兼容原来的from power_toys.components.inductor.coilcraft import Net
+    if(name == 'Net'):
+        from .coilcraft_net import Net
+        return Net
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _load_torch_model(id):
+    """用torch从硬盘载入电感的损耗模型
+
+    Args:
+        id (str): 电感型号
+
+    Returns:
+        FC_Net: 网络，predict的输入输出都是没有归一化的值
+    """
+    from ...ml_model.fc_net import FC_Net
+    return FC_Net(
+        model_path=f"{os.path.dirname(__file__)}/../../data/trained_model/coilcraft/{id}.pth",
+        scaler_x_path=f"{os.path.dirname(__file__)}/../../data/scaler/coilcraft/{id}_x_scaler.pkl",
+        scaler_y_path=f"{os.path.dirname(__file__)}/../../data/scaler/coilcraft/{id}_y_scaler.pkl"
+    )
+
+def _load_AI_model(id):
+    """从硬盘载入电感的损耗模型，有导出的npz时使用纯numpy的网络，不需要import torch
+
+    Args:
+        id (str): 电感型号
+
+    Returns:
+        NumpyMLP|FC_Net: 网络，predict的输入输出都是没有归一化的值
+    """
+    from ...ml_model.numpy_net import NumpyMLP
+    path = f"{os.path.dirname(__file__)}/../../data/trained_model/coilcraft/{id}.npz"
+    if(os.path.exists(path)):
+        return NumpyMLP.load(path)
+    return _load_torch_model(id)
+
+# 进程内共享的损耗模型缓存，以型号为键，可以通过model_registry.maxsize修改缓存的数量，
+# 通过model_registry.info查看命中情况
+model_registry = LRUCache(maxsize=64)
+
+# 损耗数据的Delaunay三角剖分保存在这个目录中，损耗数据有变化的时候重新生成
+INTERPOLATOR_DIR = f"{os.path.dirname(__file__)}/../../data/coilcraft_interpolator"
+
+def _load_interpolator(id):
+    """构建损耗数据的线性插值器，和griddata(method='linear')的结果相同，
+    三角剖分只在第一次使用的时候计算，之后从硬盘载入
+
+    Args:
+        id (str): 电感型号
+
+    Returns:
+        LinearNDInterpolator: 输入为[dc,ac,freq(MHz)]，输出为[DC损耗,AC损耗,温度]
+    """
+    import pickle
+    from scipy.spatial import Delaunay
+    from scipy.interpolate import LinearNDInterpolator
+    from ...data.loss_store import LossStore
+    store = LossStore.open('training')
+    data = store[id]
+    key = (store.snapshot.meta['fingerprint'],len(data))
+    path = f"{INTERPOLATOR_DIR}/{id}.pkl"
+    tri = None
+    if(os.path.exists(path)):
+        try:
+            with open(path,'rb') as f:
+                cached = pickle.load(f)
+            if(cached['key'] == key):
+                tri = cached['tri']
+        except Exception:
+            # scipy的版本不同等原因无法载入的时候重新计算
+            tri = None
+    if(tri is None):
+        tri = Delaunay(data[:,0:3])
+        try:
+            os.makedirs(INTERPOLATOR_DIR,exist_ok=True)
+            with open(path,'wb') as f:
+                pickle.dump({'key':key,'tri':tri},f)
+        except OSError:
+            pass
+    return LinearNDInterpolator(tri,np.asarray(data[:,3:6]))
+
+# 进程内共享的插值器缓存，以型号为键
+interpolator_registry = LRUCache(maxsize=64)
     
 class Coilcraft(BaseInductor):
+    # 根据电路的工作点计算损耗时使用的模型，'AI'为MLP，'table'为对爬取的损耗数据线性插值
+    loss_source = 'AI'
+
     def __init__(self,id) -> None:
         super().__init__()
         self.id = id
         self._model = None
+        self._spec = None
+        self._AI_cache = None
         self.dc_loss = 0
         self.ac_loss = 0
         self.temp = 0
@@ -41,11 +118,11 @@ class Coilcraft(BaseInductor):
     
     @property
     def series(self):
-        return self.model['PhotoId'].upper()
+        return self.spec('PhotoId').upper()
         
     @property
     def inductance(self):
-        data = self.model['L']*1e-6*self.N_series
+        data = self.spec('L')*1e-6*self.N_series
         return data
     
     @property
@@ -55,21 +132,30 @@ class Coilcraft(BaseInductor):
         Returns:
             _type_: _description_
         """
-        data = self.model['Isat']
+        data = self.spec('Isat')
         return data
 
     @property
     def length(self):
-        return self.model['Length']
+        return self.spec('Length')
     
     @property
     def width(self):
-        return self.model['Width']*self.N_series
+        return self.spec('Width')*self.N_series
     
     @property
     def height(self):
-        return self.model['Height']
+        return self.spec('Height')
     
+    @property
+    def price(self):
+        """单价，来自Coilcraft的数据
+
+        Returns:
+            _type_: _description_
+        """
+        return self.spec('Price')*self.N_series
+
     @property
     def dcr(self):
         """返回DCR的typical
@@ -77,14 +163,34 @@ class Coilcraft(BaseInductor):
         Returns:
             _type_: _description_
         """
-        data = self.model['DCRTyp']
+        data = self.spec('DCRTyp')
         return data*self.N_series
 
+    def spec(self,key):
+        """从CoilcraftCatalog的索引中读取参数，不需要解析json模型，索引中没有的时候从模型中读取
+
+        Args:
+            key (str): json模型中的键，比如L,Isat,DCRTyp
+
+        Returns:
+            float|str: 参数
+        """
+        if(self._spec is None):
+            from .catalog import CoilcraftCatalog
+            row = CoilcraftCatalog.default().row(self.id)
+            self._spec = False if row is None else row
+        if(self._spec is not False and key in self._spec.dtype.names):
+            return self._spec[key].item()
+        return self.model[key]
+
     @property
     def model(self):
         # 懒加载获取电感的模型
         if(self._model is None):
-            if(os.path.exists(self.loss_model_file)):
+            snap = snapshot.active()
+            if(snap is not None and self.id in snap.coilcraft_index):
+                self._model = snap.coilcraft_model(self.id)
+            elif(os.path.exists(self.loss_model_file)):
                 with open(self.loss_model_file,'r') as f:
                     model = json.load(f)
                 self._model = model
@@ -95,9 +201,8 @@ class Coilcraft(BaseInductor):
 
     @classmethod
     def list_all(cls):
-        __root__ = os.path.dirname(__file__)
-        result = os.listdir(__root__+"/../../data/model")
-        return [x[:-4] for x in result]
+        from .catalog import CoilcraftCatalog
+        return CoilcraftCatalog.default().ids.tolist()
 
     @property
     def loss_model_file(self):
@@ -117,16 +222,7 @@ class Coilcraft(BaseInductor):
         Returns:
             list:分别是0:电流ripple，1：交流损耗,2:直流损耗
         """
-        _url = 'https://www.coilcraft.com/api/partssearch/explore-losses'
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.84 Mobile Safari/537.36',
-            'request-context':'appId=cid-v1:b8de02ec-3510-4f92-b94d-04ab30614bc6',
-            'accept':'application/json, text/plain, */*',
-            'content-type':'application/json;charset=UTF-8',
-            'accept-encoding':'gzip, deflate, br',
-            'accept-language':'zh-CN,zh;q=0.9'
-        }
+        from .coilcraft_api import post
         freq_lower = freq_lower/1e6
         freq_upper = freq_upper/1e6
         
@@ -153,19 +249,13 @@ class Coilcraft(BaseInductor):
             },
             "LossCalculationData":[self.model]
         }
-        x = requests.post(_url, data =json.dumps(payload),headers=headers)
-        data = json.loads(x.text)
+        # 同样的payload直接使用data/coilcraft_api_cache中缓存的响应
+        data = post(payload)
         data = data['LossCalculationData'][0]['LossCalculations']
-        x_val = []
-        ac_loss_val = np.array([])
-        dc_loss_val = np.array([])
-        temp_val = np.array([])
-
-        for item in data:
-            x_val.append(item['XAxis'])
-            ac_loss_val = np.append(ac_loss_val,item['ACLoss']/1e3)
-            dc_loss_val = np.append(dc_loss_val,item['DCLoss']/1e3)
-            temp_val    = np.append(temp_val,item['PartTemperature'])
+        x_val = [item['XAxis'] for item in data]
+        ac_loss_val = np.array([item['ACLoss'] for item in data])/1e3
+        dc_loss_val = np.array([item['DCLoss'] for item in data])/1e3
+        temp_val = np.array([item['PartTemperature'] for item in data],dtype=float)
         return [x_val,ac_loss_val,dc_loss_val,temp_val]
 
     def get_loss_by_ripple(self,dc,ac_lower,ac_upper,freq):
@@ -199,27 +289,59 @@ class Coilcraft(BaseInductor):
         """根据本地的数据进行预测
 
         Args:
-            dc (_type_): _description_
-            ac (_type_): _description_
-            freq (_type_): _description_
+            dc (A): 直流电流
+            ac (A): 交流电流
+            freq (Hz): 频率
 
         Returns:
-            _type_: _description_
+            _type_: [DC损耗,AC损耗]，输入为数组的时候最后一维是[DC损耗,AC损耗]，饱和的工作点为nan
         """
-        if(dc+ac/2 > self.isat):
+        dc,ac,freq = np.broadcast_arrays(dc,ac,freq)
+        saturated = dc+ac/2 > self.isat
+        if(saturated.all() and dc.ndim == 0):
             print("Saturated by current")
             return 0
-        else:
-            data = np.loadtxt(f'{os.path.dirname(__file__)}/../data/coilcraft_loss_for_training/{self.id}.txt',delimiter=',')
+        result = self.predict_table(dc,ac,freq)[...,:2]
+        if(saturated.any()):
+            print("Saturated by current")
+            result[saturated] = np.nan
+        return result
+
+    @property
+    def interpolator(self):
+        """从进程内的缓存中获取损耗数据的插值器
 
-            # # 将数据分割为输入（features）和输出（targets）
-            features = data[:, 0:3]
-            targets = data[:, 3:6]
+        Returns:
+            LinearNDInterpolator: 插值器
+        """
+        return interpolator_registry.get(self.id,_load_interpolator)
+
+    def predict_table(self,dc,ac,freq):
+        """对爬取的损耗数据线性插值，超出数据范围的工作点为nan
+
+        Args:
+            dc (A): 直流电流，可以是数组
+            ac (A): 交流电流，可以是数组
+            freq (Hz): 频率，可以是数组
 
-            arr = np.array([[dc,ac,freq]])
-            xyz_new = griddata(features, targets, arr, method='linear')[0]
-            return(xyz_new[:-1])
+        Returns:
+            np.ndarray: shape为dc,ac,freq广播之后的shape再加上最后一维的3，分别为[DC损耗,AC损耗,温度]
+        """
+        dc,ac,freq = np.broadcast_arrays(dc,ac,freq)
+        shape = dc.shape
+        # 数据中的频率单位是MHz
+        points = np.column_stack((dc.ravel(),ac.ravel(),freq.ravel()/1e6))
+        return self.interpolator(points).reshape(shape+(3,))
     
+    @property
+    def AI_model(self):
+        """从进程内的缓存中获取损耗模型，只有第一次使用的时候才会从硬盘载入
+
+        Returns:
+            NumpyMLP|FC_Net: 网络
+        """
+        return model_registry.get(self.id,_load_AI_model)
+
     def predict_AI(self,dc,ac,freq):
         """根据机器学习的模型来预测损耗
 
@@ -231,47 +353,102 @@ class Coilcraft(BaseInductor):
         Returns:
             _type_: [DC损耗,AC损耗,温度]
         """
-        # 加载模型
-        model = Net()
-        model.load_state_dict(torch.load(f'{os.path.dirname(__file__)}/../../data/trained_model/coilcraft/{self.id}.pth'))
-        model.eval()
-        input_new = np.array([[dc,ac,freq/1e6]])
-
-        X_scaler = joblib.load(f"{os.path.dirname(__file__)}/../../data/scaler/coilcraft/{self.id}_x_scaler.pkl")
-        y_scaler = joblib.load(f"{os.path.dirname(__file__)}/../../data/scaler/coilcraft/{self.id}_y_scaler.pkl")
-
-        new_scaled = X_scaler.transform(input_new)
-        inputs = torch.from_numpy(new_scaled).float()
-        outputs = model(inputs)
-        xyz_out = y_scaler.inverse_transform(outputs.detach().numpy())[0]
-        return xyz_out
+        return self.predict_AI_batch(dc,ac,freq)
     
-    @property
-    def loss_dc(self):
+    def predict_AI_batch(self,dc,ac,freq):
+        """批量预测损耗，所有的工作点只做一次归一化和一次前向计算
+
+        Args:
+            dc (A): 直流电流，可以是数组
+            ac (A): 交流电流，可以是数组
+            freq (Hz): 频率，可以是数组
+
+        Returns:
+            np.ndarray: shape为dc,ac,freq广播之后的shape再加上最后一维的3，分别为[DC损耗,AC损耗,温度]，
+            比如输入长度为N的数组，返回N*3的数组
+        """
+        dc,ac,freq = np.broadcast_arrays(dc,ac,freq)
+        shape = dc.shape
+        input_new = np.column_stack((dc.ravel(),ac.ravel(),freq.ravel()/1e6))
+        xyz_out = self.AI_model.predict(input_new)
+        return xyz_out.reshape(shape+(3,))
+
+    def predict_on_circuit(self):
+        """根据电路的工作点预测损耗，同一个工作点和loss_source的结果会被缓存，
+        loss_dc,loss_ac和temperature共用一次计算结果
+
+        Returns:
+            np.ndarray: [...,0]为DC损耗，[...,1]为AC损耗，[...,2]为温度
+        """
         idc = self.circuit_param('iave')
         iac = self.circuit_param('iripple')
         fs = self.circuit_param('fs')
-        return self.predict_AI(idc,iac,fs)[0]
+        loss_source = self.loss_source
+        if(self._AI_cache is not None):
+            source_cache,idc_cache,iac_cache,fs_cache,result = self._AI_cache
+            if(source_cache == loss_source and np.array_equal(idc,idc_cache) and np.array_equal(iac,iac_cache) and np.array_equal(fs,fs_cache)):
+                return result
+        if(loss_source == 'table'):
+            result = self.predict_table(idc,iac,fs)
+        else:
+            result = self.predict_AI_batch(idc,iac,fs)
+        self._AI_cache = (loss_source,idc,iac,fs,result)
+        return result
+    
+    # [()]使得标量工作点返回标量，批量工作点返回数组
+    @property
+    def loss_dc(self):
+        result = self.predict_on_circuit()
+        loss = result[...,0]
+        if(self.thermal_temp is not None):
+            # 模型预测的DC损耗对应模型预测的温度，按铜的温度系数换算到thermal_temp
+            loss = loss*(1+ALPHA_CU*(self.thermal_temp-25))/(1+ALPHA_CU*(result[...,2]-25))
+        return loss[()]
 
     @property
     def loss_ac(self):
-        idc = self.circuit_param('iave')
-        iac = self.circuit_param('iripple')
-        fs = self.circuit_param('fs')
-        return self.predict_AI(idc,iac,fs)[1]
+        return self.predict_on_circuit()[...,1][()]
 
     @property
     def temperature(self):
-        idc = self.circuit_param('iave')
-        iac = self.circuit_param('iripple')
-        fs = self.circuit_param('fs')
-        return self.predict_AI(idc,iac,fs)[2]
+        """电感的温度，进行了电热计算时为求得的温度，否则为模型预测的温度(环境温度25°C)
+        """
+        if(self.thermal_temp is not None):
+            return self.thermal_temp
+        return self.predict_on_circuit()[...,2][()]
+
+    @property
+    def rth(self):
+        """由损耗模型得到的等效热阻(K/W)，即模型预测的温升/模型预测的损耗，模型预测时的环境温度为25°C。
+        和loss_dc,loss_ac一样通过predict_on_circuit计算，loss_source为'table'时使用插值得到的温度和损耗，不使用MLP；
+        超出数据范围(插值结果为nan)的工作点热阻为0，即不参与电热计算。不需要电感参与电热计算时给solve_thermal传入rth={电感的c_index:None}
+
+        Returns:
+            float: 热阻
+        """
+        result = self.predict_on_circuit()
+        with np.errstate(divide='ignore',invalid='ignore'):
+            rth = (result[...,2]-25)/(result[...,0]+result[...,1])
+        return np.clip(np.nan_to_num(rth,nan=0,posinf=0,neginf=0),0,None)[()]
 
     def __str__(self) -> str:
         return f"Inductor: {self.id} with inductance: {self.inductance}, DCR: {self.dcr}, dimensions: {self.length}mm *{self.width}mm *{self.height}mm."
 
     @classmethod
     def id_from_inductance(cls,inductance,series):
+        """在CoilcraftCatalog中查找系列中感值最接近的电感，找不到的时候按Coilcraft的命名规则生成型号
+
+        Args:
+            inductance (H): 感值
+            series (str): 系列
+
+        Returns:
+            str: 型号
+        """
+        from .catalog import CoilcraftCatalog
+        selected = CoilcraftCatalog.default().select(series=series,inductance_min=inductance*0.99,inductance_max=inductance*1.01)
+        if(len(selected)>0):
+            return str(selected.ids[np.argmin(np.abs(selected.inductance-inductance))])
         if(inductance>=9.9e-6):
             id = f"{series}-{inductance*1e6:.0f}3"
         elif(inductance >= 0.99e-6):
@@ -0,0 +1,131 @@
+# -*- coding: UTF-8 -*-
+
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+
+_root_path = os.path.dirname(__file__)
+
+API_URL = 'https://www.coilcraft.com/api/partssearch/explore-losses'
+API_PATH = '/api/partssearch/explore-losses'
+# 设置之后请求发到这个地址，比如本地的coilcraft_server
+ENV_API_URL = 'POWER_TOYS_COILCRAFT_URL'
+# 响应缓存的目录
+ENV_CACHE_DIR = 'POWER_TOYS_COILCRAFT_CACHE'
+CACHE_DIR = f"{_root_path}/../../data/coilcraft_api_cache"
+# 请求的超时，单位为s
+REQUEST_TIMEOUT = 30
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.84 Mobile Safari/537.36',
+    'request-context':'appId=cid-v1:b8de02ec-3510-4f92-b94d-04ab30614bc6',
+    'accept':'application/json, text/plain, */*',
+    'content-type':'application/json;charset=UTF-8',
+    'accept-encoding':'gzip, deflate, br',
+    'accept-language':'zh-CN,zh;q=0.9'
+}
+
+# 正在进行的请求，同样的payload只发一次，其他线程等待同一个结果
+_inflight = {}
+_lock = threading.Lock()
+
+def get_url():
+    return os.environ.get(ENV_API_URL) or API_URL
+
+def get_cache_dir():
+    return os.environ.get(ENV_CACHE_DIR) or CACHE_DIR
+
+def payload_key(payload,url = None):
+    """接口地址和payload的哈希，键的顺序不影响结果；不同地址的响应互不混用，本地接口生成的响应不会被当作Coilcraft的响应
+
+    Args:
+        payload (dict): 请求的内容
+        url (str, optional): 接口地址. Defaults to None，使用get_url().
+
+    Returns:
+        str: sha256
+    """
+    content = {'url':url or get_url(),'payload':payload}
+    return hashlib.sha256(json.dumps(content,sort_keys=True,separators=(',',':'),default=float).encode('utf-8')).hexdigest()
+
+class ResponseCache():
+    """保存在硬盘上的响应缓存，每个响应一个json文件，文件名为接口地址和payload的哈希
+    """
+    def __init__(self,path = None) -> None:
+        self.path = path or get_cache_dir()
+
+    def file(self,key):
+        return f"{self.path}/{key[:2]}/{key}.json"
+
+    def __contains__(self,key):
+        return os.path.exists(self.file(key))
+
+    def get(self,key):
+        """
+        Returns:
+            dict: 缓存的响应，没有的时候返回None
+        """
+        try:
+            with open(self.file(key),'r') as f:
+                return json.load(f)
+        except (OSError,ValueError):
+            return None
+
+    def put(self,key,response):
+        path = self.file(key)
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        # 先写临时文件再替换，其他进程不会读到写了一半的响应
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path,'w') as f:
+            json.dump(response,f)
+        os.replace(tmp_path,path)
+
+def _request(payload):
+    import requests
+    response = requests.post(get_url(),data=json.dumps(payload,default=float),headers=HEADERS,timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return json.loads(response.text)
+
+def post(payload,cache = None):
+    """发送请求，同样的payload优先使用缓存，多个线程同时请求同样的payload时只发送一次
+
+    Args:
+        payload (dict): 请求的内容
+        cache (ResponseCache, optional): 响应缓存. Defaults to None，使用get_cache_dir().
+
+    Returns:
+        dict: 响应
+    """
+    cache = cache or ResponseCache()
+    key = payload_key(payload)
+    response = cache.get(key)
+    if(response is not None):
+        return response
+    with _lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if(owner):
+            future = Future()
+            _inflight[key] = future
+    if(not owner):
+        return future.result()
+    try:
+        # 等锁的时候其他线程可能已经完成了同样的请求
+        response = cache.get(key)
+        if(response is None):
+            response = _request(payload)
+            try:
+                cache.put(key,response)
+            except OSError:
+                # 缓存目录不可写的时候不保存
+                pass
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key,None)
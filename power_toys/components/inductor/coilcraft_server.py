@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+"""本地的Coilcraft损耗接口，用于离线测试和benchmark。缓存中有的请求返回缓存的响应，
+没有的时候用本地的损耗模型生成响应
+
+    python -m power_toys.components.inductor.coilcraft_server --port 8000
+    export POWER_TOYS_COILCRAFT_URL=http://127.0.0.1:8000/api/partssearch/explore-losses
+"""
+import json
+import argparse
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .coilcraft_api import API_URL,API_PATH,ResponseCache,payload_key
+
+def synthetic_response(payload):
+    """用本地的损耗模型生成和Coilcraft接口格式相同的响应，损耗的单位为mW，Frequency的XAxis单位为MHz
+
+    Args:
+        payload (dict): 请求的内容
+
+    Returns:
+        dict: 响应
+    """
+    from .coilcraft import Coilcraft
+    inputs = payload['ExploreLossesInputModel']
+    if(inputs['GraphType'] == 'Frequency'):
+        x_val = np.linspace(inputs['Frequency']['Lower'],inputs['Frequency']['Upper'],inputs['Interval']+1)
+        freq = x_val*1e6
+        ac = inputs['RippleCurrent']['Lower']
+    else:
+        x_val = np.linspace(inputs['RippleCurrent']['Lower'],inputs['RippleCurrent']['Upper'],inputs['Interval']+1)
+        freq = inputs['Frequency']['Lower']*1e6
+        ac = x_val
+    result = []
+    for model in payload['LossCalculationData']:
+        loss = Coilcraft(model['PartNumber']).predict_AI_batch(inputs['CurrentIDC'],ac,freq)
+        loss = np.broadcast_to(loss,x_val.shape+(3,))
+        result.append({
+            'PartNumber':model['PartNumber'],
+            'LossCalculations':[
+                {'XAxis':float(x),'DCLoss':float(dc_loss*1e3),'ACLoss':float(ac_loss*1e3),'PartTemperature':float(temp)}
+                for x,(dc_loss,ac_loss,temp) in zip(x_val,loss)
+            ]
+        })
+    return {'LossCalculationData':result}
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if(self.path != API_PATH):
+            self.send_error(404)
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length',0))))
+        # 回放的是Coilcraft接口的响应
+        key = payload_key(payload,API_URL)
+        response = self.server.cache.get(key) if self.server.cache is not None else None
+        if(response is None):
+            response = synthetic_response(payload)
+        body = json.dumps(response).encode('utf-8')
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self,format,*args):
+        pass
+
+class CoilcraftServer():
+    """在后台线程中运行的本地接口
+
+    >>> with CoilcraftServer() as server:
+    >>>     os.environ['POWER_TOYS_COILCRAFT_URL'] = server.url
+    >>>     Coilcraft('XGL6060-103').get_loss_by_ripple(5,1,3,500e3)
+    """
+    def __init__(self,host = '127.0.0.1',port = 0,cache_dir = None) -> None:
+        """
+        Args:
+            host (str, optional): 地址. Defaults to '127.0.0.1'.
+            port (int, optional): 端口，0表示由系统分配. Defaults to 0.
+            cache_dir (str, optional): 回放的响应缓存目录，只使用Coilcraft接口的响应. Defaults to None，只生成响应.
+        """
+        self.httpd = ThreadingHTTPServer((host,port),_Handler)
+        self.httpd.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.httpd.requests = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host,port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    @property
+    def requests(self):
+        """收到的请求数
+        """
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever,daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if(self._thread is not None):
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,*args):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='本地的Coilcraft损耗接口')
+    parser.add_argument('--host',default='127.0.0.1')
+    parser.add_argument('--port',type=int,default=8000)
+    parser.add_argument('--cache',default=None,help='回放的响应缓存目录')
+    args = parser.parse_args()
+    server = CoilcraftServer(args.host,args.port,args.cache)
+    print(f"serving on {server.url}")
+    server.httpd.serve_forever()
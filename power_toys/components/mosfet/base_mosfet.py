@@ -8,8 +8,7 @@ import numpy as np
 import sqlite3 as sq
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import Column, Integer, String,Float
-from ...data.database import component_session,component_engine
-import pandas as pd
+from ...data.database import component_engine,get_engine,session_scope
 from sqlalchemy.sql import select, text
 from ..Base import BaseComponent
 from ...common.const import *
@@ -17,6 +16,24 @@ import copy
 
 DBBase = declarative_base()
 
+# 存在数据库中的FoM，计算方式和FoM,NFoM,NFoMoss,FoM_vgs属性相同，由save_to_db等写数据库的接口同步更新
+FOM_COLUMNS = {
+    'fom'       :   'rdson*qg*kdyn*ktemp',
+    'nfom'      :   'rdson*cosst*kdyn*ktemp',
+    'nfomoss'   :   'cosse*rdson*kdyn*ktemp',
+    'fom_vgs'   :   'rdson*qg*kdyn*ktemp*(vgs-vgs_min)'
+}
+
+MOSFET_INDEXES = {
+    'ix_mosfet_vbr'         :   'vbr',
+    'ix_mosfet_rdson'       :   'rdson',
+    'ix_mosfet_footprint'   :   'footprint',
+    'ix_mosfet_vbr_fom'     :   'vbr,fom',
+    'ix_mosfet_vbr_nfom'    :   'vbr,nfom',
+    'ix_mosfet_vbr_nfomoss' :   'vbr,nfomoss',
+    'ix_mosfet_vbr_fom_vgs' :   'vbr,fom_vgs'
+}
+
 class MOSFET(DBBase,BaseComponent):
     __tablename__ = 'MOSFET'
 
@@ -55,7 +72,9 @@ class MOSFET(DBBase,BaseComponent):
         return ['con_loss','dri_loss','cap_loss','switch_off_loss','switch_on_loss','qrr_loss']
 
     def parallel(self,N=2):
-        mos_tmp = copy.deepcopy(self)
+        # 不拷贝所在的电路（包括电路中的其他元件），修改完参数之后新的mos和原来的mos引用同一个电路
+        circuit = self.__dict__.get('circuit')
+        mos_tmp = copy.deepcopy(self,{id(circuit):None}) if circuit is not None else copy.deepcopy(self)
         mos_tmp.rdson   = self.rdson/N
         # 假定并联使用不同的驱动器
         mos_tmp.rg      = self.rg
@@ -66,6 +85,9 @@ class MOSFET(DBBase,BaseComponent):
         mos_tmp.cosst   = N*self.cosst
         mos_tmp.qrr     = N*self.qrr
         mos_tmp.qgs2    = N*self.qgs2
+        if(circuit is not None):
+            # 新的mos不在电路中，不需要让电路的工作点缓存失效
+            mos_tmp.__dict__['circuit'] = circuit
         return mos_tmp
 
     def mos_in_series(self,rdson):
@@ -95,28 +117,41 @@ class MOSFET(DBBase,BaseComponent):
         Returns:
             _type_: _description_
         """
-        items = component_session.query(MOSFET).filter(condition).all()
+        with session_scope() as session:
+            items = session.query(MOSFET).filter(condition).all()
         return items
     
     @classmethod
     def load_from_lib(cls,_id = None):
-        """从数据库中载入数据
+        """从数据库中载入数据。只读的查询不经过session，直接用连接池中的连接执行SELECT，
+        不需要commit，也不需要深拷贝ORM载入的对象
 
         Args:
             _id (str, optional): MOSFET的型号. Defaults to None.
 
         Returns:
-            MOSFET: MOSFET的实例
+            MOSFET: MOSFET的实例，没有找到的时候返回None
         """
-        mosfet = component_session.query(MOSFET).filter_by(id=_id).first()
-        return copy.deepcopy(mosfet)
+        table = cls.__table__
+        with get_engine().connect() as connection:
+            row = connection.execute(select(table).where(table.c.id == _id)).mappings().first()
+        if(row is None):
+            return None
+        mosfet = cls()
+        for key,value in row.items():
+            setattr(mosfet,key,value)
+        return mosfet
     
 # TODO 如果mos是深拷贝出来的，可能会有BUG
     def save_to_db(self):
         """如果已经存在，就返回已经存在的数据，否则保存数据
         """
-        component_session.merge(self)
-        component_session.commit()
+        with session_scope() as session:
+            session.merge(self)
+            session.flush()
+            MOSFET.sync_FoM([self.id],session.connection())
+        from .catalog import MOSFETCatalog
+        MOSFETCatalog.invalidate(db_changed=True)
 
     @property
     def NFoM(self):
@@ -168,10 +203,26 @@ class MOSFET(DBBase,BaseComponent):
         except TypeError:
             log_error("con_loss参数不完整，请检查mos参数")
     
+    @property
+    def rdson_temp_factor(self):
+        """结温为thermal_temp时Rdson的温度系数相对于ktemp的倍数。ktemp为结温KTEMP_REF_TEMP时Rdson相对于25°C的倍数，
+        其他温度线性插值
+
+        Returns:
+            float: 没有进行电热计算(thermal_temp为None)或者没有ktemp参数时为1
+        """
+        if(self.thermal_temp is None or self.ktemp is None):
+            # 没有ktemp时由_con_loss报告参数不完整
+            return 1
+        return (1+(self.ktemp-1)*(self.thermal_temp-25)/(KTEMP_REF_TEMP-25))/self.ktemp
+
     @property
     def con_loss(self):
         irms = self.circuit_param('irms')
-        return self._con_loss(irms)
+        loss = self._con_loss(irms)
+        if(loss is None):
+            return None
+        return loss*self.rdson_temp_factor
 
     def _dri_loss(self,fs):
         """计算驱动损耗
@@ -302,10 +353,11 @@ class MOSFET(DBBase,BaseComponent):
     
     @classmethod
     def export_excel(cls,path):
+        import pandas as pd
         path = path.strip()
         if(path[-5:] == '.xlsx'):
             sql = "SELECT * FROM MOSFET"
-            df = pd.read_sql_query(sql, component_engine)
+            df = pd.read_sql_query(sql, get_engine())
             df.to_excel(path, engine='openpyxl', index=False)
         else:
             print("invalid file path")
@@ -313,23 +365,212 @@ class MOSFET(DBBase,BaseComponent):
     
     @classmethod
     def append_from_excel(cls,path):
-        df = pd.read_excel(path, engine='openpyxl')
-        table_name = "MOSFET"
-        with component_engine.connect() as connection:
-            for index, row in df.iterrows():
-                select_query = text(f"SELECT * FROM {table_name} WHERE id = :id")
-                result = connection.execute(select_query, {'id': row['ID']}).fetchone()
-                if result is None:
-                    df.iloc[index:index+1].to_sql(table_name, con=component_engine, if_exists='append', index=False)
+        report = cls.import_table(path,overwrite=False)
+        if(report is None):
+            # import_table已经输出了错误信息
+            return
+        for _id in report[report.status != 'new'].id:
+            print(f"{_id} 已经存在")
+
+    @classmethod
+    def import_table(cls,source,overwrite = False,engine = None):
+        """批量导入器件参数，所有的插入和更新在一个事务中通过executemany完成
+
+        Args:
+            source (str|pd.DataFrame): .xlsx/.csv文件的路径或者DataFrame，列名不区分大小写，
+                只导入mosfet_param_list中的参数，没有给出的参数保持数据库中原来的值
+            overwrite (bool, optional): 数据库中已经存在并且参数不同的器件是否用新的参数覆盖. Defaults to False.
+            engine (optional): 数据库. Defaults to None，使用component_engine.
+
+        Returns:
+            pd.DataFrame: 冲突报告，id,status(new/identical/changed),written(是否写入了数据库),
+                changes(changed的参数，{参数:(数据库中的值,导入的值)})
+        """
+        import pandas as pd
+        if(isinstance(source,pd.DataFrame)):
+            df = source.copy()
+        elif(str(source).strip().endswith('.csv')):
+            df = pd.read_csv(str(source).strip())
+        elif(str(source).strip().endswith('.xlsx')):
+            df = pd.read_excel(str(source).strip(), engine='openpyxl')
+        else:
+            log_error("只支持.xlsx,.csv文件或者DataFrame")
+            return None
+        df.columns = [str(column).strip().lower() for column in df.columns]
+        columns = [key for key in mosfet_param_list.keys() if key in df.columns]
+        if('id' not in columns):
+            log_error("导入的数据没有id列")
+            return None
+        df = df[columns]
+        df = df[df['id'].notna()]
+        df['id'] = df['id'].astype(str).str.strip()
+        # 同一个文件中重复的型号以最后一行为准
+        df = df.drop_duplicates('id',keep='last')
+        value_columns = [key for key in columns if key != 'id']
+        for key in value_columns:
+            if(key == 'footprint'):
+                df[key] = df[key].astype(object).where(df[key].notna(),None)
+            else:
+                df[key] = pd.to_numeric(df[key],errors='coerce')
+        records = [{key:(None if (key != 'id' and key != 'footprint' and np.isnan(value)) else value) for key,value in row.items()} for row in df.to_dict('records')]
+
+        report = []
+        inserts = []
+        updates = []
+        with (get_engine() if engine is None else engine).begin() as connection:
+            existing = {row[0]:row[1:] for row in connection.execute(text(f"SELECT id,{','.join(value_columns) or 'id'} FROM {cls.__tablename__}"))}
+            for record in records:
+                _id = record['id']
+                if(_id not in existing):
+                    inserts.append(record)
+                    report.append((_id,'new',True,{}))
+                    continue
+                changes = {}
+                for key,old in zip(value_columns,existing[_id]):
+                    new = record[key]
+                    if(key == 'footprint'):
+                        # 空的封装在数据库中可能是''或者NULL
+                        if(str(old or '') != str(new or '')):
+                            changes[key] = (old,new)
+                    elif(old is None and new is None):
+                        continue
+                    elif(old is None or new is None):
+                        changes[key] = (old,new)
+                    elif(not np.isclose(float(old),new,rtol=1e-9,atol=0)):
+                        changes[key] = (old,new)
+                if(changes):
+                    if(overwrite):
+                        updates.append(record)
+                    report.append((_id,'changed',overwrite,changes))
                 else:
-                    print(f"{row['ID']} 已经存在")
+                    report.append((_id,'identical',False,{}))
+            if(inserts):
+                connection.execute(text(f"INSERT INTO {cls.__tablename__} ({','.join(columns)}) VALUES ({','.join([':'+key for key in columns])})"),inserts)
+            if(updates and value_columns):
+                connection.execute(text(f"UPDATE {cls.__tablename__} SET {','.join([f'{key}=:{key}' for key in value_columns])} WHERE id = :id"),updates)
+            written = [record['id'] for record in inserts+updates]
+            if(written):
+                cls.sync_FoM(written,connection)
+        if(engine is None):
+            from .catalog import MOSFETCatalog
+            MOSFETCatalog.invalidate(db_changed=True)
+        return pd.DataFrame(report,columns=['id','status','written','changes'])
+
+    @classmethod
+    def has_FoM_columns(cls,connection):
+        """数据库是否已经通过migrate_schema添加了FoM列
+
+        Args:
+            connection (sqlalchemy.engine.Connection): 数据库连接
+
+        Returns:
+            bool: _description_
+        """
+        columns = [row[1].lower() for row in connection.execute(text(f"PRAGMA table_info({cls.__tablename__})"))]
+        return all([key in columns for key in FOM_COLUMNS.keys()])
+
+    @classmethod
+    def migrate_schema(cls,engine = None):
+        """数据库迁移：添加fom,nfom,nfomoss,fom_vgs列并计算已有数据的值，给vbr,rdson,footprint以及(vbr,FoM)加索引。
+        可以重复调用，已经存在的列和索引会跳过
+
+        Args:
+            engine (optional): 数据库. Defaults to None，使用component_engine.
+        """
+        with (get_engine() if engine is None else engine).begin() as connection:
+            columns = [row[1].lower() for row in connection.execute(text(f"PRAGMA table_info({cls.__tablename__})"))]
+            for key in FOM_COLUMNS.keys():
+                if(key not in columns):
+                    connection.execute(text(f"ALTER TABLE {cls.__tablename__} ADD COLUMN {key} REAL"))
+                    log_info(f"添加{key}列")
+            for name,index_columns in MOSFET_INDEXES.items():
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {cls.__tablename__}({index_columns})"))
+            cls.sync_FoM(connection=connection)
+        if(engine is None):
+            from .catalog import MOSFETCatalog
+            MOSFETCatalog.invalidate(db_changed=True)
+
+    @classmethod
+    def sync_FoM(cls,ids = None,connection = None):
+        """根据器件参数更新数据库中的FoM列，数据库没有迁移的时候跳过
+
+        Args:
+            ids (list, optional): 需要更新的型号. Defaults to None，更新所有器件.
+            connection (optional): 数据库连接，传入的时候在调用者的事务中执行. Defaults to None.
+        """
+        if(connection is None):
+            with component_engine.begin() as connection:
+                return cls.sync_FoM(ids,connection)
+        if(not cls.has_FoM_columns(connection)):
+            return
+        sql = f"UPDATE {cls.__tablename__} SET "+','.join([f"{key}={value}" for key,value in FOM_COLUMNS.items()])
+        if(ids is None):
+            connection.execute(text(sql))
+        else:
+            connection.execute(text(sql+" WHERE id = :id"),[{'id':_id} for _id in ids])
+
+    @classmethod
+    def rank_by_FoM(cls,vbr,vbr_max = None,fom = 'fom',limit = 10):
+        """在一个电压等级内按FoM从小到大排序。数据库迁移之后是一次走(vbr,fom)索引的查询
+
+        Args:
+            vbr (V): 电压等级，vbr_max为None时只查询vbr相等的器件
+            vbr_max (V, optional): 给出时查询vbr<=器件vbr<vbr_max的器件. Defaults to None.
+            fom (str, optional): fom,nfom,nfomoss或者fom_vgs. Defaults to 'fom'.
+            limit (int, optional): 返回的数量. Defaults to 10.
+
+        Returns:
+            list: MOSFET的列表
+        """
+        if(fom not in FOM_COLUMNS):
+            log_error(f"不支持的FoM:{fom}")
+            return []
+        with session_scope() as session:
+            query = session.query(MOSFET)
+            if(vbr_max is None):
+                query = query.filter(MOSFET.vbr == vbr)
+            else:
+                query = query.filter(MOSFET.vbr >= vbr,MOSFET.vbr < vbr_max)
+            # 没有迁移的数据库直接用表达式排序
+            order = fom if cls.has_FoM_columns(session.connection()) else FOM_COLUMNS[fom]
+            return query.filter(text(f"{order} IS NOT NULL")).order_by(text(order)).limit(limit).all()
+
+    @property
+    def rdson_loss_coef(self):
+        """并联N个管子时，导通损耗正比于rdson，其余的损耗都正比于N，即正比于1/rdson，
+        所以在当前的工作点下，总损耗可以写成a*rdson+b/rdson
+
+        Returns:
+            tuple: (a,b)
+        """
+        con_loss = self.con_loss
+        return con_loss/self.rdson,(self.total_loss-con_loss)*self.rdson
 
     @property
     def opt_rdson(self):
-        """根据电路条件，通过二分法找最优的rdson
+        """根据电路条件找最优的rdson。总损耗为a*rdson+b/rdson，最优的rdson为sqrt(b/a)，
+        如果电路的工作点和mos的参数有关（比如DCX的励磁电流和cosst有关），不满足这个形式，就使用黄金分割法迭代
 
-        Args:
-            max_iter (int, optional): 最大的迭代次数. Defaults to 100.
+        Returns:
+            float: 优化的rdson，批量工作点时返回每个工作点的最优rdson
+        """
+        rdson_tmp = self.rdson
+        a,b = self.rdson_loss_coef
+        if(np.all(a > 0) and np.all(b > 0)):
+            rdson_opt = np.clip(np.sqrt(b/a),rdson_tmp/100,rdson_tmp*100)
+            # 用另外一个rdson的损耗检查是否满足a*rdson+b/rdson的形式
+            rdson_check = rdson_tmp*2
+            loss_check = self.mos_in_series(rdson_check).total_loss
+            if(np.all(np.isclose(loss_check,a*rdson_check+b/rdson_check,rtol=1e-9,atol=0))):
+                return rdson_opt
+        if(np.ndim(a) != 0):
+            # 黄金分割法只支持标量的工作点
+            log_error("批量工作点下总损耗不满足a*rdson+b/rdson的形式，请逐个工作点计算opt_rdson")
+            return None
+        return self._opt_rdson_iterative()
+
+    def _opt_rdson_iterative(self):
+        """根据电路条件，通过黄金分割法找最优的rdson
 
         Returns:
             float: 优化的rdson
@@ -354,6 +595,54 @@ class MOSFET(DBBase,BaseComponent):
                 print(f"{MAX_ITER_NUM}次迭代后，不收敛")
                 return (b + a) / 2
         return (b + a) / 2
+
+    @property
+    def operating_point(self):
+        """获取mos在电路中的工作点，可以直接传给opt_rdson_all
+
+        Returns:
+            dict: irms,fs,on_voltage,on_current,off_voltage,off_current,qrr_voltage,cap_voltage
+        """
+        return {param_name:self.circuit_param(param_name) for param_name in OPERATING_POINT_PARAMS}
+
+    @classmethod
+    def opt_rdson_all(cls,irms,fs,on_voltage = 0,on_current = 0,off_voltage = 0,off_current = 0,qrr_voltage = 0,cap_voltage = 0,condition = None):
+        """在同一个工作点下，批量计算数据库中所有mos的最优rdson和最小损耗
+
+        Args:
+            irms (A): 电流有效值
+            fs (Hz): 开关频率
+            on_voltage (V, optional): 开通电压. Defaults to 0.
+            on_current (A, optional): 开通电流. Defaults to 0.
+            off_voltage (V, optional): 关断电压. Defaults to 0.
+            off_current (A, optional): 关断电流. Defaults to 0.
+            qrr_voltage (V, optional): 反向恢复的电压. Defaults to 0.
+            cap_voltage (V, optional): Coss充放电的电压. Defaults to 0.
+            condition (optional): 筛选mos的条件，比如MOSFET.vbr>=60. Defaults to None.
+
+        Returns:
+            pd.DataFrame: id,rdson,rdson_opt,N_opt(最优的die相对于当前器件的大小),loss_min，按loss_min从小到大排序
+        """
+        import pandas as pd
+        from .catalog import MOSFETCatalog
+        # catalog的参数都是数组，直接代替MOSFET实例复用损耗计算函数
+        mos = MOSFETCatalog.load(condition)
+        terms = mos.loss_terms(irms,fs,on_voltage,on_current,off_voltage,off_current,qrr_voltage,cap_voltage)
+        loss_r = terms.pop('con_loss')
+        loss_inv = sum(terms.values())
+        with np.errstate(divide='ignore',invalid='ignore'):
+            a = loss_r/mos.rdson
+            b = loss_inv*mos.rdson
+            rdson_opt = np.sqrt(b/a)
+            loss_min = 2*np.sqrt(a*b)
+        result = pd.DataFrame({
+            'id':mos.ids,
+            'rdson':mos.rdson,
+            'rdson_opt':rdson_opt,
+            'N_opt':mos.rdson/rdson_opt,
+            'loss_min':loss_min
+        })
+        return result.sort_values('loss_min',ignore_index=True)
     
     @property
     def vf(self):
@@ -0,0 +1,242 @@
+# -*- coding: UTF-8 -*-
+
+import numpy as np
+from ...data.database import session_scope
+from ...data import snapshot
+from ...model_params import mosfet_param_list
+from .base_mosfet import MOSFET
+
+# 字符串类型的参数，其余参数都是float
+STRING_PARAMS = ['id','footprint']
+
+# 进程内共享的catalog，第一次使用的时候从数据库载入
+_default_catalog = None
+
+class MOSFETCatalog():
+    """内存中的列式MOSFET库，把数据库中的MOSFET表一次性载入numpy的结构化数组，
+    筛选和排序都是数组操作，需要的时候再生成MOSFET实例
+
+    >>> catalog = MOSFETCatalog.default()
+    >>> selected = catalog[catalog.vbr >= 1.3*vin/Ncell].sort('vbr','rdson')
+    >>> mos = selected.device(0)
+
+    所有的参数都可以作为数组直接访问，比如catalog.rdson，因此catalog也可以直接代替MOSFET实例
+    传给MOSFET._con_loss等损耗函数，一次算出所有器件的损耗
+    """
+
+    def __init__(self,data:np.ndarray) -> None:
+        self.data = data
+
+    @classmethod
+    def load(cls,condition = None):
+        """从数据库载入MOSFET表
+
+        Args:
+            condition (optional): 筛选mos的条件，比如MOSFET.vbr>=60. Defaults to None，载入整个表.
+
+        Returns:
+            MOSFETCatalog: catalog
+        """
+        columns = [getattr(MOSFET,key) for key in mosfet_param_list.keys()]
+        with session_scope() as session:
+            query = session.query(*columns)
+            if(condition is not None):
+                query = query.filter(condition)
+            rows = query.all()
+        return cls.from_records(rows)
+
+    @classmethod
+    def from_records(cls,rows):
+        """由参数的记录生成catalog
+
+        Args:
+            rows (list): 每一行的参数顺序和mosfet_param_list相同
+
+        Returns:
+            MOSFETCatalog: catalog
+        """
+        keys = list(mosfet_param_list.keys())
+        columns = list(zip(*rows)) if rows else [[] for _ in keys]
+        dtype = []
+        values = []
+        for key,column in zip(keys,columns):
+            if(key in STRING_PARAMS):
+                column = ['' if x is None else str(x) for x in column]
+                dtype.append((key,f"U{max([len(x) for x in column]+[1])}"))
+            else:
+                column = [np.nan if x is None else x for x in column]
+                dtype.append((key,'f8'))
+            values.append(column)
+        data = np.empty(len(rows),dtype=dtype)
+        for key,column in zip(keys,values):
+            data[key] = column
+        return cls(data)
+
+    @classmethod
+    def default(cls):
+        """进程内共享的catalog，只在第一次使用的时候载入数据库。使用快照的时候直接映射快照中的数组，不访问数据库
+
+        Returns:
+            MOSFETCatalog: catalog
+        """
+        global _default_catalog
+        if(_default_catalog is None):
+            snap = snapshot.active()
+            if(snap is not None and 'mosfet' in snap and not snapshot.is_stale('mosfet')):
+                _default_catalog = cls(snap['mosfet'])
+            else:
+                _default_catalog = cls.load()
+        return _default_catalog
+
+    @classmethod
+    def invalidate(cls,db_changed = False):
+        """数据库更新之后，下次调用default的时候重新载入
+
+        Args:
+            db_changed (bool, optional): 数据库是否被修改，修改之后快照中的MOSFET表已经过期，改为从数据库载入. Defaults to False.
+        """
+        global _default_catalog
+        if(db_changed):
+            snapshot.mark_stale('mosfet')
+        _default_catalog = None
+
+    def __getattr__(self,name):
+        data = self.__dict__.get('data')
+        if(data is not None and name in data.dtype.names):
+            return data[name]
+        raise AttributeError(name)
+
+    def __getitem__(self,key):
+        """用bool数组或者序号数组筛选，返回新的catalog；用参数名返回参数的数组
+
+        Args:
+            key (str|np.ndarray|slice): 参数名或者筛选条件
+
+        Returns:
+            MOSFETCatalog|np.ndarray: 筛选之后的catalog或者参数数组
+        """
+        if(isinstance(key,str)):
+            return self.data[key]
+        return MOSFETCatalog(np.atleast_1d(self.data[key]))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.device(i)
+
+    def filter(self,mask):
+        return self[np.asarray(mask)]
+
+    def sort(self,*keys,descending = False):
+        """按参数排序，多个参数的时候依次比较
+
+        Args:
+            keys (str): 参数名
+            descending (bool, optional): 是否从大到小排序. Defaults to False.
+
+        Returns:
+            MOSFETCatalog: 排序之后的catalog
+        """
+        idx = np.lexsort([self.data[key] for key in reversed(keys)])
+        if(descending):
+            idx = idx[::-1]
+        return self[idx]
+
+    def top(self,n):
+        return self[:n]
+
+    @property
+    def ids(self):
+        return self.data['id']
+
+    def index(self,_id):
+        """获取型号在catalog中的序号
+
+        Args:
+            _id (str): 型号
+
+        Returns:
+            int: 序号，不存在的时候返回-1
+        """
+        idx = np.flatnonzero(self.data['id'] == _id)
+        return int(idx[0]) if len(idx) else -1
+
+    def device(self,i):
+        """生成第i个器件的MOSFET实例，不访问数据库
+
+        Args:
+            i (int): 序号
+
+        Returns:
+            MOSFET: MOSFET实例
+        """
+        row = self.data[i]
+        params = {}
+        for key in mosfet_param_list.keys():
+            value = row[key]
+            params[key] = str(value) if key in STRING_PARAMS else (None if np.isnan(value) else float(value))
+        mos = MOSFET()
+        for key,value in params.items():
+            setattr(mos,key,value)
+        return mos
+
+    def get(self,_id):
+        """根据型号生成MOSFET实例
+
+        Args:
+            _id (str): 型号
+
+        Returns:
+            MOSFET: MOSFET实例，不存在的时候返回None
+        """
+        i = self.index(_id)
+        if(i < 0):
+            return None
+        return self.device(i)
+
+    def loss_terms(self,irms,fs,on_voltage = 0,on_current = 0,off_voltage = 0,off_current = 0,qrr_voltage = 0,cap_voltage = 0):
+        """在同一个工作点下，一次算出catalog中所有mos的各项损耗。catalog直接代替MOSFET实例传给损耗函数
+
+        Args:
+            irms (A): 电流有效值
+            fs (Hz): 开关频率
+            on_voltage (V, optional): 开通电压. Defaults to 0.
+            on_current (A, optional): 开通电流. Defaults to 0.
+            off_voltage (V, optional): 关断电压. Defaults to 0.
+            off_current (A, optional): 关断电流. Defaults to 0.
+            qrr_voltage (V, optional): 反向恢复的电压. Defaults to 0.
+            cap_voltage (V, optional): Coss充放电的电压. Defaults to 0.
+
+        Returns:
+            dict: 损耗名称(和MOSFET.loss_list相同)到损耗数组的字典
+        """
+        return {
+            'con_loss':MOSFET._con_loss(self,irms),
+            'dri_loss':MOSFET._dri_loss(self,fs),
+            'cap_loss':MOSFET._cap_loss(self,fs,cap_voltage),
+            'switch_off_loss':MOSFET._switch_off_loss(self,fs,off_voltage,off_current),
+            'switch_on_loss':MOSFET._switch_on_loss(self,fs,on_voltage,on_current),
+            'qrr_loss':MOSFET._qrr_loss(self,fs,qrr_voltage)
+        }
+
+    def rank(self,operating_point,top_k = None,quantity = 1):
+        """按工作点下的总损耗给catalog中的mos排序
+
+        Args:
+            operating_point (dict): 工作点，比如BaseCircuit.operating_point或者MOSFET.operating_point的返回值
+            top_k (int, optional): 只返回损耗最小的top_k个. Defaults to None，全部返回.
+            quantity (int, optional): 该位置上mos的数量，损耗乘以数量. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: id,rdson,vbr,各项损耗,total_loss，按total_loss从小到大排序，参数不完整的mos排在最后
+        """
+        import pandas as pd
+        terms = {key:value*quantity for key,value in self.loss_terms(**operating_point).items()}
+        result = pd.DataFrame({'id':self.ids,'rdson':self.rdson,'vbr':self.vbr,**terms})
+        result['total_loss'] = sum(terms.values())
+        result = result.sort_values('total_loss',ignore_index=True)
+        if(top_k is not None):
+            result = result.head(top_k)
+        return result
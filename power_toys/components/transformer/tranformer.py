@@ -1,6 +1,4 @@
 import  numpy as np
-import pyaedt
-from pyaedt.maxwell import Maxwell3d
 from ..ansys import Ansys
 from ..Base import BaseComponent
 
@@ -329,6 +327,7 @@ class Transformer(BaseComponent):
         Solver = "EddyCurrent"
         non_graphical = False
 
+        import pyaedt
         self.m3d = pyaedt.Maxwell3d(
             projectname=pyaedt.generate_unique_project_name(),
             designname=design_name,
@@ -1,6 +1,7 @@
-from scipy.signal import find_peaks, sawtooth
 import numpy as np
-import matplotlib.pyplot as plt
+
+# numpy 2.0之后trapz改名为trapezoid
+trapz = getattr(np,'trapezoid',None) or np.trapz
 
 class Waveform():
     def __init__(self, arr):
@@ -31,7 +32,7 @@ class Waveform():
     @property
     def avg(self):
         # Compute average value using trapezoidal rule
-        return np.trapz(self.arr[:, 1], self.arr[:, 0]) / (self.arr[-1, 0] - self.arr[0, 0])
+        return trapz(self.arr[:, 1], self.arr[:, 0]) / (self.arr[-1, 0] - self.arr[0, 0])
 
     @property
     def peak(self):
@@ -46,6 +47,7 @@ class Waveform():
     @property
     def period(self):
         # Calculate the period of the waveform
+        from scipy.signal import find_peaks
         peaks, _ = find_peaks(self.arr[:, 1])
         if len(peaks) < 2:
             raise ValueError("Not enough peaks in waveform to calculate period")
@@ -55,7 +57,7 @@ class Waveform():
     @property
     def integral(self):
         # Compute integral of the waveform
-        return np.trapz(self.arr[:, 1], self.arr[:, 0])
+        return trapz(self.arr[:, 1], self.arr[:, 0])
     
     def integral_range(self,xmax = 0,xmin = 0):
         x = self.arr[:,0]
@@ -64,7 +66,7 @@ class Waveform():
             return self.integral
         else:
             idx_filter = (x<=xmax) & (x >= xmin)
-            return np.trapz(y[idx_filter],x[idx_filter])
+            return trapz(y[idx_filter],x[idx_filter])
     
     def ydx(self,xmax,xmin=0):
         self.integral_range(xmax=xmax,xmin=xmin)
@@ -99,7 +101,7 @@ class Waveform():
         x = self.arr[:,0]
         y = self.arr[:,1]
         idx_filter = (x<=xmax) & (x >= xmin)
-        return np.trapz((x*y)[idx_filter],x[idx_filter])
+        return trapz((x*y)[idx_filter],x[idx_filter])
 
     def energy(self,vmax,vmin = 0):
         """根据C-V曲线计算等效，根据C*V*deltaV计算
@@ -139,6 +141,7 @@ class Waveform():
         return self.charge(vmax,vmin)/vmax
     
     def plot(self):
+        import matplotlib.pyplot as plt
         plt.plot(self.arr[:,0],self.arr[:,1])
     
     @classmethod
@@ -151,6 +154,7 @@ class Waveform():
     
     @classmethod
     def gen_triangle(cls, t, Am = 1, Ts = 1, duty = 0.5,biased = True):
+        from scipy.signal import sawtooth
         # Generate triangle wave
         waveform_values = Am * sawtooth(2 * np.pi * t / Ts, duty)
         if(biased):
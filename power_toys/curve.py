@@ -1,9 +1,11 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 from power_toys.model_params import curve_type_list
 from power_toys.log import log_error,log_info
 
+# numpy 2.0之后trapz改名为trapezoid
+trapz = getattr(np,'trapezoid',None) or np.trapz
+
 curve_path = f"{os.path.dirname(__file__)}\data\curve"
 
 class Curve():
@@ -113,7 +115,7 @@ class Curve():
     
     def yxdx(self,xmax,xmin = 0):
         idx_filter = (self.x<=xmax) & (self.x >= xmin)
-        return np.trapz((self.x*self.y)[idx_filter],self.x[idx_filter])
+        return trapz((self.x*self.y)[idx_filter],self.x[idx_filter])
 
     def energy(self,vmax,vmin = 0):
         """根据C-V曲线计算等效，根据C*V*deltaV计算
@@ -142,10 +144,10 @@ class Curve():
         
     def ydx(self,xmax,xmin=0):
         idx_filter = (self.x<=xmax) & (self.x >= xmin)
-        return np.trapz(self.y[idx_filter],self.x[idx_filter])
+        return trapz(self.y[idx_filter],self.x[idx_filter])
     @property
     def average(self):
-        return np.trapz(self.y,self.x)/np.abs(self.x[0]-self.x[-1])
+        return trapz(self.y,self.x)/np.abs(self.x[0]-self.x[-1])
 
     def charge(self,vmax,vmin = 0):
         """根据电压和电容数组数值积分计算电荷
@@ -1,37 +1,181 @@
 # -*- coding: UTF-8 -*-
 
-from sqlalchemy import create_engine, Column, Integer, String,Float
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, Column, Integer, String,Float, event
+from sqlalchemy.orm import sessionmaker, scoped_session
+from contextlib import contextmanager
 import os
 import json
+import threading
+from pathlib import Path
+from urllib.parse import quote
 
 _root_path = os.path.dirname(__file__)
 db_file = f"{_root_path}/../config.json"
 
-if not os.path.exists(db_file):
-    while(1):
-        path = input("请输入数据库文件的地址:\n")
-        if(os.path.exists(path) and path.endswith(".db")):
-            break
-        print("没有找到数据库文件，请重新输入:\n")
-    config = {
-        "db_file":path
-    }
-    with open(db_file, 'w') as f:
-        json.dump(config, f, indent=4)
-else:
-    with open(db_file,'r') as f:
-        config = json.load(f)
-    if not (os.path.exists(config['db_file']) and config['db_file'].endswith(".db")):
-        while(1):
-            path = input("请输入数据库文件的地址:\n")
-            if(os.path.exists(path) and path.endswith(".db")):
-                config['db_file'] = path
-                break
-            print(f"在{path}没有找到数据库文件，请重新输入")
-    with open(db_file, 'w') as f:
-        json.dump(config, f, indent=4)
-        
-component_engine = create_engine(f"sqlite:///{config['db_file']}", echo=False)
-Session = sessionmaker(bind=component_engine)
-component_session = Session()
\ No newline at end of file
+# 数据库文件的地址，优先级高于config.json
+ENV_DB_FILE = 'POWER_TOYS_DB'
+# 设为1时以只读(immutable)模式打开数据库，适合只查询数据库的worker进程
+ENV_DB_READONLY = 'POWER_TOYS_DB_READONLY'
+# 设为1时把数据库切换到WAL模式，读写可以并发。切换是持久的，数据库旁边会生成-wal和-shm文件，所以默认不使用
+ENV_DB_WAL = 'POWER_TOYS_DB_WAL'
+
+# 连接池的大小，每个线程使用自己的连接，读操作可以并发
+POOL_SIZE = 8
+# 写锁被占用时等待的时间(s)
+BUSY_TIMEOUT = 30
+
+# 数据库在第一次使用的时候才创建，import的时候不读取配置，也不会等待输入
+_state = {
+    'db_file'   :   None,
+    'read_only' :   None,
+    'wal'       :   None,
+    'engine'    :   None,
+    'session'   :   None
+}
+
+def configure(path = None,read_only = None,save = False,wal = None):
+    """指定数据库文件，已经创建的engine和session会被关闭，下次使用时按新的配置重新创建
+
+    Args:
+        path (str, optional): 数据库文件的地址. Defaults to None，按环境变量POWER_TOYS_DB和config.json查找.
+        read_only (bool, optional): 是否以只读(immutable)模式打开. Defaults to None，按环境变量POWER_TOYS_DB_READONLY.
+        save (bool, optional): 是否把path写入config.json. Defaults to False.
+        wal (bool, optional): 是否把数据库切换到WAL模式，读写可以并发. Defaults to None，按环境变量POWER_TOYS_DB_WAL，默认不使用.
+    """
+    if(path is not None and not (os.path.exists(path) and str(path).endswith(".db"))):
+        raise FileNotFoundError(f"在{path}没有找到数据库文件")
+    dispose()
+    _state['db_file'] = None if path is None else os.path.abspath(path)
+    _state['read_only'] = read_only
+    _state['wal'] = wal
+    if(save and path is not None):
+        with open(db_file, 'w') as f:
+            json.dump({"db_file":_state['db_file']}, f, indent=4)
+
+def dispose():
+    """关闭已经创建的engine和session
+    """
+    if(_state['session'] is not None):
+        _state['session'].remove()
+    if(_state['engine'] is not None):
+        _state['engine'].dispose()
+    _state['session'] = None
+    _state['engine'] = None
+
+def get_db_file():
+    """按configure，环境变量POWER_TOYS_DB，config.json的顺序查找数据库文件
+
+    Returns:
+        str: 数据库文件的地址
+    """
+    if(_state['db_file'] is not None):
+        return _state['db_file']
+    path = os.environ.get(ENV_DB_FILE)
+    if(not path and os.path.exists(db_file)):
+        with open(db_file,'r') as f:
+            path = json.load(f).get('db_file')
+    if not (path and os.path.exists(path) and path.endswith(".db")):
+        raise FileNotFoundError(f"没有找到数据库文件{path or ''}，请设置环境变量{ENV_DB_FILE}，调用power_toys.data.database.configure(path,save=True)，或者在{os.path.abspath(db_file)}中设置db_file")
+    return path
+
+def is_read_only():
+    if(_state['read_only'] is not None):
+        return _state['read_only']
+    return os.environ.get(ENV_DB_READONLY,'0').strip().lower() in ['1','true','yes']
+
+def is_wal():
+    if(_state['wal'] is not None):
+        return _state['wal']
+    return os.environ.get(ENV_DB_WAL,'0').strip().lower() in ['1','true','yes']
+
+def get_url():
+    """数据库的URL，只读模式下使用immutable的URI，sqlite不会加锁，也不会检查文件的修改
+
+    Returns:
+        str: URL
+    """
+    path = os.path.abspath(get_db_file())
+    if(is_read_only()):
+        uri_path = Path(path).as_posix()
+        if(not uri_path.startswith('/')):
+            # windows的盘符
+            uri_path = '/'+uri_path
+        return f"sqlite:///file://{quote(uri_path,safe='/:')}?mode=ro&immutable=1&uri=true"
+    return f"sqlite:///{path}"
+
+def _on_connect(dbapi_connection,connection_record):
+    """每个新建的sqlite连接的设置
+    """
+    cursor = dbapi_connection.cursor()
+    if(not is_read_only()):
+        if(is_wal()):
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # WAL模式下synchronous=NORMAL不会损坏数据库，只是掉电时可能丢失最后的事务
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT*1000}")
+    cursor.close()
+
+def get_engine():
+    if(_state['engine'] is None):
+        # 连接由连接池分给不同的线程，同一时刻一个连接只被一个线程使用，所以可以关闭check_same_thread
+        engine = create_engine(get_url(), echo=False, pool_size=POOL_SIZE, max_overflow=POOL_SIZE,
+                               connect_args={'check_same_thread':False,'timeout':BUSY_TIMEOUT})
+        event.listen(engine,'connect',_on_connect)
+        _state['engine'] = engine
+    return _state['engine']
+
+def _scope():
+    return (os.getpid(),threading.get_ident())
+
+def get_session():
+    """每个进程的每个线程使用各自的session
+
+    Returns:
+        scoped_session: 调用时返回当前线程的Session，也可以直接调用query,merge等方法
+    """
+    if(_state['session'] is None):
+        # commit之后不过期已经载入的对象，读操作结束时commit释放sqlite的读锁，返回的对象仍然可以直接使用
+        _state['session'] = scoped_session(sessionmaker(bind=get_engine(),expire_on_commit=False),scopefunc=_scope)
+    return _state['session']
+
+@contextmanager
+def session_scope():
+    """当前线程的session上的一个事务，正常退出时commit，出错时rollback
+
+    >>> with session_scope() as session:
+    >>>     session.merge(mos)
+    """
+    session = get_session()()
+    try:
+        yield session
+        session.commit()
+    except:
+        session.rollback()
+        raise
+
+def _after_fork_in_child():
+    # fork出来的子进程不能使用父进程的连接，丢弃连接池和session，需要的时候重新创建
+    if(_state['engine'] is not None):
+        _state['engine'].dispose(close=False)
+    _state['session'] = None
+
+if(hasattr(os,'register_at_fork')):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+class _LazyProxy():
+    """第一次访问属性的时候才创建对象，兼容原来的component_engine和component_session
+    """
+    def __init__(self,factory) -> None:
+        object.__setattr__(self,'_factory',factory)
+
+    def __getattr__(self,name):
+        return getattr(self._factory(),name)
+
+    def __setattr__(self,name,value):
+        setattr(self._factory(),name,value)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._factory.__name__}>"
+
+component_engine = _LazyProxy(get_engine)
+component_session = _LazyProxy(get_session)
@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+
+import os
+import numpy as np
+from .snapshot import write_snapshot,Snapshot,dir_fingerprint
+
+_root_path = os.path.dirname(__file__)
+
+# 爬取的电感损耗数据，频率的单位是MHz
+LOSS_COLUMNS = ['dc','ac','freq','dc_loss','ac_loss','temp']
+# 名称到(目录,列名)，combined数据集以系列为单位，第一列是感值
+DATASETS = {
+    'training'      :   ('coilcraft_loss_for_training',LOSS_COLUMNS),
+    'more_data'     :   ('coilcraft_loss_for_training_more_data',LOSS_COLUMNS),
+    'combined'      :   ('combined_loss_for_training',['L']+LOSS_COLUMNS),
+    'combined_more' :   ('combined_more_loss_for_training',['L']+LOSS_COLUMNS),
+}
+
+# 进程内已经打开的数据集
+_opened = {}
+
+def store_file(name):
+    return f"{_root_path}/{DATASETS[name][0]}.snap"
+
+def convert(source_dir,path,columns):
+    """把目录中每个型号一个的csv转换为一个二进制文件，所有型号的数据按型号的顺序拼接为一个二维数组，
+    index中记录每个型号的起止行
+
+    Args:
+        source_dir (str): csv所在的目录，文件名为型号.txt
+        path (str): 输出文件的地址
+        columns (list): 列名
+    """
+    import pandas as pd
+    ids = sorted([file[:-4] for file in os.listdir(source_dir) if file.endswith('.txt')])
+    tables = []
+    for _id in ids:
+        table = pd.read_csv(f"{source_dir}/{_id}.txt",header=None,dtype='float64',float_precision='round_trip').values
+        if(table.shape[1] != len(columns)):
+            raise ValueError(f"{_id}.txt有{table.shape[1]}列，应为{len(columns)}列")
+        tables.append(table)
+    stops = np.cumsum([len(table) for table in tables]).astype(np.int64)
+    index = np.empty(len(ids),dtype=[('id',f"U{max([len(_id) for _id in ids]+[1])}"),('start','i8'),('stop','i8')])
+    index['id'] = ids
+    index['start'] = stops-[len(table) for table in tables]
+    index['stop'] = stops
+    data = np.concatenate(tables) if tables else np.empty((0,len(columns)))
+    write_snapshot(path,{'data':data,'index':index},meta={
+        'columns':columns,
+        'source':os.path.basename(os.path.normpath(source_dir)),
+        'fingerprint':dir_fingerprint(source_dir)
+    })
+
+class LossStore():
+    """二进制的损耗数据，数组通过内存映射读取，打开的时候不解析文本
+
+    >>> store = LossStore.open('training')
+    >>> data = store['XAL5030-122']
+    >>> features,targets = store.features('XAL5030-122'),store.targets('XAL5030-122')
+    """
+    def __init__(self,path) -> None:
+        self.snapshot = Snapshot(path)
+        self.columns = self.snapshot.meta['columns']
+        self._index = None
+
+    @classmethod
+    def open(cls,name = 'training'):
+        """打开data中的数据集，二进制文件不存在或者csv有变化的时候先转换
+
+        Args:
+            name (str, optional): DATASETS中的名称. Defaults to 'training'.
+
+        Returns:
+            LossStore: 数据集
+        """
+        if(name not in _opened):
+            dirname,columns = DATASETS[name]
+            source_dir = f"{_root_path}/{dirname}"
+            path = store_file(name)
+            store = cls(path) if os.path.exists(path) else None
+            if(store is None or store.snapshot.meta.get('fingerprint') != dir_fingerprint(source_dir)):
+                convert(source_dir,path,columns)
+                store = cls(path)
+            _opened[name] = store
+        return _opened[name]
+
+    @property
+    def index(self):
+        """型号到(起始行,结束行)的字典
+        """
+        if(self._index is None):
+            index = self.snapshot['index']
+            self._index = {str(_id):(int(start),int(stop)) for _id,start,stop in zip(index['id'],index['start'],index['stop'])}
+        return self._index
+
+    @property
+    def ids(self):
+        return list(self.index.keys())
+
+    @property
+    def data(self):
+        return self.snapshot['data']
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self,_id):
+        return _id in self.index
+
+    def __getitem__(self,_id):
+        start,stop = self.index[_id]
+        return self.data[start:stop]
+
+    def column(self,_id,name):
+        return self[_id][:,self.columns.index(name)]
+
+    def features(self,_id):
+        """模型的输入，除了损耗和温度之外的列
+
+        Args:
+            _id (str): 型号
+
+        Returns:
+            np.ndarray: 二维数组
+        """
+        return self[_id][:,:-3]
+
+    def targets(self,_id):
+        """模型的输出，dc_loss,ac_loss,temp
+
+        Args:
+            _id (str): 型号
+
+        Returns:
+            np.ndarray: 二维数组
+        """
+        return self[_id][:,-3:]
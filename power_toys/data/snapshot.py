@@ -0,0 +1,290 @@
+# -*- coding: UTF-8 -*-
+
+import os
+import threading
+import json
+import hashlib
+import time
+import numpy as np
+
+# 文件格式的版本，格式改变时加1，旧版本的快照需要重新导出
+SNAPSHOT_VERSION = 1
+MAGIC = b'PTSNAP\x00\x00'
+# 每个数组的起始位置按64字节对齐
+ALIGN = 64
+# 设置快照文件的地址之后，MOSFETCatalog.default()和Coilcraft.model直接从快照中读取
+ENV_SNAPSHOT = 'POWER_TOYS_SNAPSHOT'
+
+_root_path = os.path.dirname(__file__)
+COILCRAFT_MODEL_DIR = f"{_root_path}/coilcraft_model"
+FEA_DIR = f"{_root_path}/FEA data"
+CORE_FEA_DIR = f"{_root_path}/../components/Core_FEA"
+
+# 当前进程使用的快照，None表示还没有查找，False表示没有快照；stale中是数据库写入之后已经过期的数组
+_active = {'snapshot':None,'stale':set()}
+
+def _descr_from_json(descr):
+    if(isinstance(descr,list)):
+        return [tuple(item) for item in descr]
+    return descr
+
+def write_snapshot(path,arrays,meta = None):
+    """把多个numpy数组写入一个文件，文件头是json，之后是按64字节对齐的数组原始数据
+
+    Args:
+        path (str): 文件地址
+        arrays (dict): 名称到数组的字典
+        meta (dict, optional): 写入文件头的其他信息. Defaults to None.
+    """
+    header = {'version':SNAPSHOT_VERSION,'created':time.time(),'meta':meta or {},'arrays':{}}
+    offset = 0
+    for name,array in arrays.items():
+        array = np.ascontiguousarray(array)
+        header['arrays'][name] = {
+            'descr':np.lib.format.dtype_to_descr(array.dtype),
+            'shape':list(array.shape),
+            'offset':offset
+        }
+        offset += -(-array.nbytes//ALIGN)*ALIGN
+    header_bytes = json.dumps(header).encode('utf-8')
+    # 数据部分的起始位置
+    data_start = -(-(len(MAGIC)+8+len(header_bytes))//ALIGN)*ALIGN
+    # 临时文件名包含进程和线程，多个进程同时生成同一个快照的时候不会写入同一个临时文件
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path,'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name,array in arrays.items():
+            f.seek(data_start+header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start+offset)
+    # 先写临时文件再替换，其他进程不会读到写了一半的快照
+    os.replace(tmp_path,path)
+
+class Snapshot():
+    """只读的快照，数组都是np.memmap，打开的时候不复制数据，多个进程共享操作系统的页缓存
+
+    >>> snapshot = Snapshot('catalog.snap')
+    >>> snapshot['mosfet']['rdson']
+    """
+    def __init__(self,path) -> None:
+        self.path = path
+        with open(path,'rb') as f:
+            if(f.read(len(MAGIC)) != MAGIC):
+                raise ValueError(f"{path}不是快照文件")
+            header_len = int(np.frombuffer(f.read(8),dtype=np.uint64)[0])
+            self.header = json.loads(f.read(header_len).decode('utf-8'))
+        if(self.header['version'] != SNAPSHOT_VERSION):
+            raise ValueError(f"快照的版本为{self.header['version']}，当前版本为{SNAPSHOT_VERSION}，请重新导出")
+        self._data_start = -(-(len(MAGIC)+8+header_len)//ALIGN)*ALIGN
+        self._arrays = {}
+
+    @property
+    def meta(self):
+        return self.header['meta']
+
+    @property
+    def names(self):
+        return list(self.header['arrays'].keys())
+
+    def __contains__(self,name):
+        return name in self.header['arrays']
+
+    def __getitem__(self,name):
+        if(name not in self._arrays):
+            info = self.header['arrays'][name]
+            dtype = np.lib.format.descr_to_dtype(_descr_from_json(info['descr']))
+            shape = tuple(info['shape'])
+            if(int(np.prod(shape)) == 0):
+                self._arrays[name] = np.empty(shape,dtype=dtype)
+            else:
+                self._arrays[name] = np.memmap(self.path,dtype=dtype,mode='r',offset=self._data_start+info['offset'],shape=shape)
+        return self._arrays[name]
+
+    def coilcraft_model(self,_id):
+        """从快照中获取Coilcraft电感的原始json模型
+
+        Args:
+            _id (str): 电感型号
+
+        Returns:
+            dict: 和data/coilcraft_model中的json相同，没有的时候返回None
+        """
+        index = self.coilcraft_index.get(_id)
+        if(index is None):
+            return None
+        offsets = self['coilcraft_json_offset']
+        return json.loads(self['coilcraft_json'][offsets[index]:offsets[index+1]].tobytes().decode('utf-8'))
+
+    @property
+    def coilcraft_index(self):
+        if('_coilcraft_index' not in self.__dict__):
+            self._coilcraft_index = {str(_id):i for i,_id in enumerate(self['coilcraft']['id'])}
+        return self._coilcraft_index
+
+    def fea_table(self,name):
+        """获取FEA data中的表格
+
+        Args:
+            name (str): 相对于FEA data的路径，比如'vo100/Bmax_500kHz_k0_Vo100.csv'
+
+        Returns:
+            tuple: (列名,二维数组)，没有表头的文件列名为[]
+        """
+        return self.meta['fea_columns'][name],self[f"fea/{name}"]
+
+    @property
+    def fea_names(self):
+        return list(self.meta['fea_columns'].keys())
+
+    def core_fea_table(self,name):
+        """获取components/Core_FEA中的表格
+
+        Args:
+            name (str): 相对于Core_FEA的路径，比如'Core_Loss/DMR51W/1.0Mhz_k2.csv'
+
+        Returns:
+            tuple: (列名,二维数组)
+        """
+        return self.meta['core_fea_columns'][name],self[f"core_fea/{name}"]
+
+    @property
+    def core_fea_names(self):
+        # 旧的快照中没有Core_FEA的表格
+        return list(self.meta.get('core_fea_columns',{}).keys())
+
+def dir_fingerprint(path,suffix = '.txt'):
+    """目录中文件的指纹，文件名和大小都没有变化的时候认为由这些文件生成的数据仍然有效
+
+    Args:
+        path (str): 目录
+        suffix (str, optional): 只统计这个后缀的文件. Defaults to '.txt'.
+
+    Returns:
+        str: 指纹
+    """
+    items = []
+    for entry in sorted(os.scandir(path),key=lambda x:x.name):
+        if(entry.name.endswith(suffix)):
+            items.append(f"{entry.name}:{entry.stat().st_size}")
+    return hashlib.sha1('\n'.join(items).encode('utf-8')).hexdigest()
+
+def coilcraft_arrays():
+    """把data/coilcraft_model中的json转成列式的结构化数组，数值参数为float，其余为字符串，
+    同时保存原始的json，用于需要完整模型的地方
+
+    Returns:
+        dict: coilcraft,coilcraft_json,coilcraft_json_offset
+    """
+    ids = sorted([file[:-4] for file in os.listdir(COILCRAFT_MODEL_DIR) if file.endswith('.txt')])
+    raw = []
+    models = []
+    for _id in ids:
+        with open(f"{COILCRAFT_MODEL_DIR}/{_id}.txt",'rb') as f:
+            content = f.read()
+        raw.append(content)
+        models.append(json.loads(content))
+    keys = []
+    for model in models:
+        keys += [key for key in model.keys() if key not in keys]
+    dtype = [('id',f"U{max([len(_id) for _id in ids]+[1])}")]
+    columns = {}
+    for key in keys:
+        values = [model.get(key) for model in models]
+        if(all([value is None or isinstance(value,(int,float)) for value in values])):
+            dtype.append((key,'f8'))
+            columns[key] = [np.nan if value is None else float(value) for value in values]
+        elif(all([value is None or isinstance(value,(int,float,str)) for value in values])):
+            values = ['' if value is None else str(value) for value in values]
+            dtype.append((key,f"U{max([len(value) for value in values]+[1])}"))
+            columns[key] = values
+    data = np.empty(len(ids),dtype=dtype)
+    data['id'] = ids
+    for key,values in columns.items():
+        data[key] = values
+    offsets = np.cumsum([0]+[len(content) for content in raw]).astype(np.int64)
+    return {
+        'coilcraft':data,
+        'coilcraft_json':np.frombuffer(b''.join(raw),dtype=np.uint8),
+        'coilcraft_json_offset':offsets
+    }
+
+def _fea_arrays(fea_dir = FEA_DIR,prefix = 'fea'):
+    """读取目录中所有的csv
+
+    Args:
+        fea_dir (str, optional): 目录. Defaults to FEA_DIR.
+        prefix (str, optional): 数组名称的前缀. Defaults to 'fea'.
+
+    Returns:
+        tuple: (名称到数组的字典,名称到列名的字典)
+    """
+    arrays = {}
+    fea_columns = {}
+    for root,_,files in sorted(os.walk(fea_dir)):
+        for file in sorted(files):
+            if(not file.endswith('.csv')):
+                continue
+            full_path = os.path.join(root,file)
+            name = os.path.relpath(full_path,fea_dir).replace('\\','/')
+            with open(full_path,'r') as f:
+                first_line = f.readline()
+            try:
+                [float(x) for x in first_line.split(',')]
+                columns = []
+            except ValueError:
+                columns = [x.strip().strip('"') for x in first_line.split(',')]
+            arrays[f"{prefix}/{name}"] = np.loadtxt(full_path,delimiter=',',skiprows=1 if columns else 0,ndmin=2)
+            fea_columns[name] = columns
+    return arrays,fea_columns
+
+def export_snapshot(path):
+    """把数据库中的MOSFET表，data/coilcraft_model中的电感模型，data/FEA data以及components/Core_FEA中的表格导出为一个快照文件
+
+    Args:
+        path (str): 快照文件的地址
+    """
+    from ..components.mosfet.catalog import MOSFETCatalog
+    arrays = {'mosfet':MOSFETCatalog.load().data}
+    arrays.update(coilcraft_arrays())
+    fea_arrays,fea_columns = _fea_arrays()
+    arrays.update(fea_arrays)
+    core_fea_arrays,core_fea_columns = _fea_arrays(CORE_FEA_DIR,'core_fea')
+    arrays.update(core_fea_arrays)
+    write_snapshot(path,arrays,meta={'fea_columns':fea_columns,'core_fea_columns':core_fea_columns})
+
+def use(path):
+    """当前进程使用快照，path为None时不使用快照
+
+    Args:
+        path (str): 快照文件的地址
+    """
+    _active['snapshot'] = Snapshot(path) if path else False
+    _active['stale'] = set()
+    from ..components.mosfet.catalog import MOSFETCatalog
+    from ..components.inductor.catalog import CoilcraftCatalog
+    MOSFETCatalog.invalidate()
+    CoilcraftCatalog.invalidate()
+
+def active():
+    """当前进程使用的快照，第一次调用时查找环境变量POWER_TOYS_SNAPSHOT
+
+    Returns:
+        Snapshot: 快照，没有使用快照的时候返回None
+    """
+    if(_active['snapshot'] is None):
+        path = os.environ.get(ENV_SNAPSHOT)
+        _active['snapshot'] = Snapshot(path) if path else False
+    return _active['snapshot'] or None
+
+def mark_stale(name):
+    """数据库写入之后，快照中对应的数组已经过期，之后不再从快照中读取
+
+    Args:
+        name (str): 数组的名称，比如'mosfet'
+    """
+    _active['stale'].add(name)
+
+def is_stale(name):
+    return name in _active['stale']
@@ -3,12 +3,14 @@ import  sys
 from PyQt5.QtWidgets import  *
 from PyQt5 import QtWidgets, QtCore
 from ..components.mosfet.base_mosfet import MOSFET
+from ..components.mosfet.catalog import MOSFETCatalog
 from ..topology.buck import BUCK
 from ..data.database import component_session
 from PyQt5.QtChart import QChart, QChartView, QPieSeries
 from PyQt5.QtGui import QPainter
 from PyQt5.QtCore import Qt
 from power_toys.components.inductor.coilcraft import Coilcraft as Inductor
+from power_toys.components.inductor.catalog import CoilcraftCatalog
 
 class MainWindow(QMainWindow,Ui_MainWindow):
     def __init__(self, parent=None):
@@ -67,12 +69,13 @@ class MainWindow(QMainWindow,Ui_MainWindow):
         ind =   float(self.value_ind.text())
         mos1_para = float(self.value_mos1_parallel.text())
         mos2_para = float(self.value_mos2_parallel.text())
-        mos1 = MOSFET.load_from_lib(self.value_mos1.currentText().split(':')[1].strip())
-        mos2 = MOSFET.load_from_lib(self.value_mos2.currentText().split(':')[1].strip())
+        mos1 = MOSFETCatalog.default().get(self.value_mos1.currentText().split(':')[1].strip())
+        mos2 = MOSFETCatalog.default().get(self.value_mos2.currentText().split(':')[1].strip())
 
         ind_series = self.value_ind_series.currentText()
         ind_value = float(self.value_ind_inductance.currentText()[:-2])*1e-6
-        ind_id = Inductor.id_from_inductance(ind_value,ind_series)
+        # 下拉框中保存了型号，显示的感值只保留了两位小数
+        ind_id = self.value_ind_inductance.currentData() or Inductor.id_from_inductance(ind_value,ind_series)
 
         if(mos1 != None and mos2 != None):
             self.buck = BUCK(
@@ -120,43 +123,33 @@ class MainWindow(QMainWindow,Ui_MainWindow):
             ncell = float(self.value_ncell.text())
         except:
             return
-        mosfets = component_session.query(MOSFET).order_by(MOSFET.vbr,MOSFET.rdson).filter(MOSFET.vbr>=1.3*(vin/ncell)).all()
+        catalog = MOSFETCatalog.default()
+        mosfets = catalog[catalog.vbr>=1.3*(vin/ncell)].sort('vbr','rdson')
         self.value_mos1.clear()
         self.value_mos2.clear()
-        for result in mosfets:
-            self.value_mos1.addItem(f"{result.vbr}V/{result.rdson*1000:.1f}mR: {result.id}")
-            self.value_mos2.addItem(f"{result.vbr}V/{result.rdson*1000:.1f}mR: {result.id}")
+        for vbr,rdson,_id in zip(mosfets.vbr,mosfets.rdson,mosfets.ids):
+            self.value_mos1.addItem(f"{vbr}V/{rdson*1000:.1f}mR: {_id}")
+            self.value_mos2.addItem(f"{vbr}V/{rdson*1000:.1f}mR: {_id}")
     
     def update_FoM(self):
         try:
-            mos1 = MOSFET.load_from_lib(self.value_mos1.currentText().split(':')[1].strip())
-            mos2 = MOSFET.load_from_lib(self.value_mos2.currentText().split(':')[1].strip())
+            mos1 = MOSFETCatalog.default().get(self.value_mos1.currentText().split(':')[1].strip())
+            mos2 = MOSFETCatalog.default().get(self.value_mos2.currentText().split(':')[1].strip())
             self.value_FoM1.setText(f"{mos1.FoM*1e12:.1f}")
             self.value_FoM2.setText(f"{mos2.FoM*1e12:.1f}")
         except IndexError:
             return
     
     def update_inductance(self):
-        ind_list = Inductor.list_all()
         ind_series = self.value_ind_series.currentText()
         self.value_ind_inductance.clear()
-        inductance_list = []
-        for ind in ind_list:
-            ind_inst = Inductor(ind)
-            if(ind_inst.series == ind_series):
-                inductance_list.append(ind_inst.inductance)
-        
-        inductance_list = sorted(inductance_list)
-        for inductance in inductance_list:
-            self.value_ind_inductance.addItem(f"{inductance*1e6:.2f}uH")
+        selected = CoilcraftCatalog.default().select(series=ind_series)
+        for ind_id,inductance in zip(selected.ids,selected.inductance):
+            self.value_ind_inductance.addItem(f"{inductance*1e6:.2f}uH",str(ind_id))
     
     def init_ind(self):
-        ind_list = Inductor.list_all()
         self.value_ind_series.clear()
-        for ind in ind_list:
-            ind_inst = Inductor(ind)
-            if(self.value_ind_series.findText(ind_inst.series) == -1):
-                self.value_ind_series.addItem(ind_inst.series)
+        self.value_ind_series.addItems(CoilcraftCatalog.default().series_list)
 
 
 if __name__ == "__main__":
@@ -98,23 +98,43 @@ class MainWindow(QMainWindow):
         self.ui.NFoMoss.setText(f"{NFoMoss*1e15:.0f}")
     
     def load_by_condition(self):
-        condition = ''
+        # 用sqlalchemy的表达式代替拼接的SQL文本，参数通过绑定传入，可以走vbr,rdson等列的索引
+        operators = {
+            '='     :   lambda column,value:column == value,
+            '<'     :   lambda column,value:column < value,
+            '<='    :   lambda column,value:column <= value,
+            '>'     :   lambda column,value:column > value,
+            '>='    :   lambda column,value:column >= value,
+            'like'  :   lambda column,value:column.like(value)
+        }
+        condition = None
         for i in range(4):
             param_select = getattr(self.ui,f"param{i+1}_select").currentText()
             param_condition = getattr(self.ui,f"param{i+1}_condition").currentText()
             param_value = getattr(self.ui,f"param{i+1}_value").text()
             if(param_value) == '':
                 continue
-            if(i != 0):
-                logic = getattr(self.ui,f"logic{i}").currentText()
-                condition += f" {logic} "
-
-            if(param_select == 'id'):
-                condition += f"{param_select} {param_condition} '{param_value}'"
+            if(param_select != 'id' and param_condition != 'like'):
+                try:
+                    param_value = float(param_value)
+                except ValueError:
+                    QMessageBox.warning(self,"Warning",f"{param_select}的值不是数字")
+                    return
+            expression = operators[param_condition](getattr(MOSFET,param_select),param_value)
+            if(condition is None):
+                condition = expression
+                continue
+            logic = getattr(self.ui,f"logic{i}").currentText()
+            if(logic == 'AND'):
+                condition = sqlalchemy.and_(condition,expression)
+            elif(logic == 'OR'):
+                condition = sqlalchemy.or_(condition,expression)
             else:
-                condition += f"{param_select} {param_condition} {param_value}"
-            
-        query = component_session.query(MOSFET).filter(sqlalchemy.text(condition))
+                condition = sqlalchemy.and_(condition,sqlalchemy.not_(expression))
+
+        query = component_session.query(MOSFET)
+        if(condition is not None):
+            query = query.filter(condition)
         results = query.all()
         self.ui.id.clear()
         for result in results:
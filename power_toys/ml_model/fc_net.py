@@ -28,4 +28,21 @@ class FC_Net(nn.Module):
         inputs = torch.from_numpy(new_scaled).float()
         outputs = self.forward(inputs)
         xyz_out = self.y_scaler.inverse_transform(outputs.detach().numpy())
-        return xyz_out
\ No newline at end of file
+        return xyz_out
+
+    def to_numpy(self):
+        """转换为不需要torch的NumpyMLP，需要已经载入scaler
+
+        Returns:
+            NumpyMLP: 网络
+        """
+        from .numpy_net import NumpyMLP
+        return NumpyMLP.from_torch(self.state_dict(),self.X_scaler,self.y_scaler)
+
+    def export(self,path):
+        """把权重和scaler导出为npz，之后可以用NumpyMLP.load载入
+
+        Args:
+            path (str): npz的地址
+        """
+        self.to_numpy().save(path)
\ No newline at end of file
@@ -0,0 +1,188 @@
+# -*- coding: UTF-8 -*-
+
+import os
+import numpy as np
+
+_root_path = os.path.dirname(__file__)
+TRAINED_MODEL_DIR = f"{_root_path}/../data/trained_model"
+SCALER_DIR = f"{_root_path}/../data/scaler"
+
+class NumpyMLP():
+    """全连接ReLU网络的纯numpy实现，和FC_Net以及Coilcraft的Net结构相同，
+    权重和StandardScaler的参数保存在一个npz中，推理的时候不需要torch和sklearn
+
+    >>> net = NumpyMLP.load('data/trained_model/coilcraft/XAL5030-122.npz')
+    >>> net.predict(np.array([[5,3,0.5]]))
+    """
+    def __init__(self,weights,biases,x_mean,x_scale,y_mean,y_scale) -> None:
+        """
+        Args:
+            weights (list): 每一层的权重，shape为(输出,输入)，和torch.nn.Linear相同
+            biases (list): 每一层的偏置
+            x_mean (np.ndarray): 输入的StandardScaler的mean_
+            x_scale (np.ndarray): 输入的StandardScaler的scale_
+            y_mean (np.ndarray): 输出的StandardScaler的mean_
+            y_scale (np.ndarray): 输出的StandardScaler的scale_
+        """
+        # 和torch一样使用float32计算
+        self.weights = [np.ascontiguousarray(np.asarray(w,dtype=np.float32).T) for w in weights]
+        self.biases = [np.asarray(b,dtype=np.float32) for b in biases]
+        self.x_mean = np.asarray(x_mean,dtype=np.float64)
+        self.x_scale = np.asarray(x_scale,dtype=np.float64)
+        self.y_mean = np.asarray(y_mean,dtype=np.float64)
+        self.y_scale = np.asarray(y_scale,dtype=np.float64)
+
+    @classmethod
+    def from_torch(cls,state_dict,X_scaler,y_scaler):
+        """从torch的state_dict和sklearn的StandardScaler生成
+
+        Args:
+            state_dict (dict): fc1.weight,fc1.bias,fc2.weight...
+            X_scaler (StandardScaler): 输入的归一化
+            y_scaler (StandardScaler): 输出的归一化
+
+        Returns:
+            NumpyMLP: 网络
+        """
+        layers = sorted(set([key.rsplit('.',1)[0] for key in state_dict.keys()]),key=lambda x:int(x[2:]))
+        weights = [state_dict[f"{layer}.weight"].detach().cpu().numpy() for layer in layers]
+        biases = [state_dict[f"{layer}.bias"].detach().cpu().numpy() for layer in layers]
+        def scaler_params(scaler):
+            scale = scaler.scale_ if scaler.scale_ is not None else np.ones_like(scaler.mean_)
+            return scaler.mean_,scale
+        return cls(weights,biases,*scaler_params(X_scaler),*scaler_params(y_scaler))
+
+    @classmethod
+    def load(cls,path):
+        with np.load(path) as data:
+            n_layers = int(data['n_layers'])
+            return cls(
+                [data[f"w{i}"] for i in range(n_layers)],
+                [data[f"b{i}"] for i in range(n_layers)],
+                data['x_mean'],data['x_scale'],data['y_mean'],data['y_scale']
+            )
+
+    def save(self,path):
+        arrays = {'n_layers':np.array(len(self.weights))}
+        for i,(w,b) in enumerate(zip(self.weights,self.biases)):
+            arrays[f"w{i}"] = w.T
+            arrays[f"b{i}"] = b
+        np.savez(path,x_mean=self.x_mean,x_scale=self.x_scale,y_mean=self.y_mean,y_scale=self.y_scale,**arrays)
+
+    def forward(self,x):
+        """归一化之后的前向计算
+
+        Args:
+            x (np.ndarray): N*输入
+
+        Returns:
+            np.ndarray: N*输出
+        """
+        x = np.asarray(x,dtype=np.float32)
+        for w,b in zip(self.weights[:-1],self.biases[:-1]):
+            x = np.maximum(x@w+b,0)
+        return x@self.weights[-1]+self.biases[-1]
+
+    def predict(self,x):
+        """和FC_Net.predict相同，输入输出都是没有归一化的值
+
+        Args:
+            x (np.ndarray): N*输入
+
+        Returns:
+            np.ndarray: N*输出
+        """
+        x_scaled = (np.asarray(x,dtype=np.float64)-self.x_mean)/self.x_scale
+        return self.forward(x_scaled).astype(np.float64)*self.y_scale+self.y_mean
+
+class StackedMLP():
+    """把结构相同的多个NumpyMLP的权重和归一化参数叠在一起，所有网络的前向计算只做一次批量矩阵乘法
+
+    >>> stacked = StackedMLP([NumpyMLP.load(path) for path in paths])
+    >>> stacked.predict(np.array([[5,3,0.5]]))     # shape为(网络数,1,输出)
+    """
+    def __init__(self,nets) -> None:
+        """
+        Args:
+            nets (list): NumpyMLP，每一层的shape必须相同
+        """
+        shapes = set([tuple([w.shape for w in net.weights]) for net in nets])
+        if(len(shapes) != 1):
+            raise ValueError(f"网络的结构不同，无法叠加：{shapes}")
+        # weights[i]的shape为(网络数,输入,输出)
+        self.weights = [np.stack([net.weights[i] for net in nets]) for i in range(len(nets[0].weights))]
+        self.biases = [np.stack([net.biases[i] for net in nets])[:,None,:] for i in range(len(nets[0].biases))]
+        self.x_mean = np.stack([net.x_mean for net in nets])[:,None,:]
+        self.x_scale = np.stack([net.x_scale for net in nets])[:,None,:]
+        self.y_mean = np.stack([net.y_mean for net in nets])[:,None,:]
+        self.y_scale = np.stack([net.y_scale for net in nets])[:,None,:]
+
+    def __len__(self):
+        return len(self.weights[0])
+
+    def forward(self,x):
+        """归一化之后的前向计算
+
+        Args:
+            x (np.ndarray): 网络数*N*输入
+
+        Returns:
+            np.ndarray: 网络数*N*输出
+        """
+        x = np.asarray(x,dtype=np.float32)
+        for w,b in zip(self.weights[:-1],self.biases[:-1]):
+            x = np.maximum(np.matmul(x,w)+b,0)
+        return np.matmul(x,self.weights[-1])+self.biases[-1]
+
+    def predict(self,x):
+        """所有网络在同样的输入下的输出
+
+        Args:
+            x (np.ndarray): N*输入，所有网络共用；或者网络数*N*输入，每个网络各自的输入
+
+        Returns:
+            np.ndarray: 网络数*N*输出
+        """
+        x_scaled = (np.asarray(x,dtype=np.float64)-self.x_mean)/self.x_scale
+        return self.forward(x_scaled).astype(np.float64)*self.y_scale+self.y_mean
+
+def export_model(model_path,scaler_x_path,scaler_y_path,path = None):
+    """把torch的模型和sklearn的scaler导出为npz，需要torch和joblib
+
+    Args:
+        model_path (str): .pth文件
+        scaler_x_path (str): 输入的scaler
+        scaler_y_path (str): 输出的scaler
+        path (str, optional): npz的地址. Defaults to None，和.pth在同一个目录.
+
+    Returns:
+        str: npz的地址
+    """
+    import torch
+    import joblib
+    state_dict = torch.load(model_path,map_location='cpu')
+    net = NumpyMLP.from_torch(state_dict,joblib.load(scaler_x_path),joblib.load(scaler_y_path))
+    path = path or f"{os.path.splitext(model_path)[0]}.npz"
+    net.save(path)
+    return path
+
+def export_trained_models(names = ('coilcraft','transformer')):
+    """把data/trained_model中所有有对应scaler的模型导出为npz
+
+    Args:
+        names (tuple, optional): trained_model中的目录. Defaults to ('coilcraft','transformer').
+
+    Returns:
+        list: 导出的npz
+    """
+    result = []
+    for name in names:
+        for file in sorted(os.listdir(f"{TRAINED_MODEL_DIR}/{name}")):
+            if(not file.endswith('.pth')):
+                continue
+            _id = file[:-4]
+            scaler_x_path = f"{SCALER_DIR}/{name}/{_id}_x_scaler.pkl"
+            scaler_y_path = f"{SCALER_DIR}/{name}/{_id}_y_scaler.pkl"
+            if(os.path.exists(scaler_x_path) and os.path.exists(scaler_y_path)):
+                result.append(export_model(f"{TRAINED_MODEL_DIR}/{name}/{file}",scaler_x_path,scaler_y_path))
+    return result
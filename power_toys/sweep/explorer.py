@@ -0,0 +1,164 @@
+import csv
+import itertools
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor,wait,FIRST_COMPLETED
+from ..components.mosfet.base_mosfet import MOSFET
+from ..components.inductor.coilcraft import Coilcraft
+from ..model_params import mosfet_param_list
+from ..topology.buck import BUCK
+
+# 每个worker进程内的mos参数表，由_init_worker初始化
+_worker_mosfet_params = {}
+
+def _mosfet_params(mos):
+    return {key:getattr(mos,key) for key in mosfet_param_list.keys()}
+
+def _init_worker(mosfet_params):
+    global _worker_mosfet_params
+    _worker_mosfet_params = mosfet_params
+
+def _evaluate_chunk(args):
+    """计算一个工作单元中所有的元件组合，fs和Ncell使用BUCK的批量模式一次算完
+
+    Args:
+        args (tuple): (combinations,vin,vo,po,fs,Ncell)
+
+    Returns:
+        list: 每一行的内容见BuckExplorer.header
+    """
+    combinations,vin,vo,po,fs,Ncell = args
+    fs_grid = np.asarray(fs,dtype=float)[None,:]
+    Ncell_grid = np.asarray(Ncell,dtype=float)[:,None]
+    rows = []
+    for mos1_id,mos2_id,ind_id in combinations:
+        # worker中不访问数据库，直接用参数表构建mos
+        mos1 = MOSFET(**_worker_mosfet_params[mos1_id])
+        mos2 = MOSFET(**_worker_mosfet_params[mos2_id])
+        ind = Coilcraft(ind_id)
+        buck = BUCK(vin=vin,vo=vo,q_active=mos1,q_passive=mos2,ind=ind,fs=fs_grid,po=po,Ncell=Ncell_grid)
+        shape = np.broadcast(fs_grid,Ncell_grid).shape
+        loss_mos1 = np.broadcast_to(buck.loss_sum_on_component(buck.mos1),shape)
+        loss_mos2 = np.broadcast_to(buck.loss_sum_on_component(buck.mos2),shape)
+        loss_ind = np.broadcast_to(buck.loss_sum_on_component(buck.ind),shape)
+        total_loss = loss_mos1+loss_mos2+loss_ind
+        efficiency = po/(po+total_loss)
+        for i,j in np.ndindex(*shape):
+            rows.append([mos1_id,mos2_id,ind_id,fs_grid[0,j],Ncell_grid[i,0],
+                         loss_mos1[i,j],loss_mos2[i,j],loss_ind[i,j],total_loss[i,j],efficiency[i,j],
+                         ind.volume,ind.area,ind.price])
+    return rows
+
+class BuckExplorer():
+    """BUCK的设计空间搜索，遍历主动管、整流管、电感的所有组合，以及所有的fs和Ncell，
+    在多进程中按工作单元并行计算，结果按行写入csv文件
+
+    >>> explorer = BuckExplorer(48,12,100,
+    ...     q_active = MOSFET.list_all_model(MOSFET.vbr>=40),
+    ...     q_passive = MOSFET.list_all_model(MOSFET.vbr>=40),
+    ...     ind = Coilcraft.list_all(),
+    ...     fs = np.linspace(100e3,1e6,10),
+    ...     Ncell = [1,2,4])
+    >>> explorer.run('buck_sweep.csv',max_workers = 8)
+    """
+    # volume(mm^3),area(mm^2)和price目前只包含电感，mos没有尺寸的数据
+    header = ['q_active','q_passive','ind','fs','Ncell','loss_active','loss_passive','loss_ind','total_loss','efficiency','volume','area','price']
+
+    def __init__(self,vin,vo,po,q_active,q_passive,ind,fs,Ncell = [1]) -> None:
+        """
+        Args:
+            vin (V): 输入电压
+            vo (V): 输出电压
+            po (W): 输出功率
+            q_active (list): 主动管的候选，MOSFET实例或者型号
+            q_passive (list): 整流管的候选，MOSFET实例或者型号
+            ind (list): 电感的候选，Coilcraft实例或者型号
+            fs (list): 开关频率的候选
+            Ncell (list, optional): 级联数量的候选. Defaults to [1].
+        """
+        self.vin = vin
+        self.vo = vo
+        self.po = po
+        self.fs = list(np.atleast_1d(fs))
+        self.Ncell = list(np.atleast_1d(Ncell))
+        self.mosfet_params = {}
+        self.q_active = [self._register_mosfet(mos) for mos in q_active]
+        self.q_passive = [self._register_mosfet(mos) for mos in q_passive]
+        self.ind = [x.id if isinstance(x,Coilcraft) else x for x in ind]
+
+    def _register_mosfet(self,mos):
+        if(isinstance(mos,str)):
+            mos = MOSFET.load_from_lib(mos)
+        self.mosfet_params[mos.id] = _mosfet_params(mos)
+        return mos.id
+
+    @property
+    def n_combinations(self):
+        return len(self.q_active)*len(self.q_passive)*len(self.ind)*len(self.fs)*len(self.Ncell)
+
+    def iter_chunks(self,chunksize = 64):
+        """把所有的元件组合分成工作单元
+
+        Args:
+            chunksize (int, optional): 每个工作单元中元件组合的数量. Defaults to 64.
+
+        Yields:
+            tuple: 工作单元，传给_evaluate_chunk
+        """
+        combinations = itertools.product(self.q_active,self.q_passive,self.ind)
+        while True:
+            chunk = list(itertools.islice(combinations,chunksize))
+            if not chunk:
+                return
+            yield (chunk,self.vin,self.vo,self.po,self.fs,self.Ncell)
+
+    def iter_results(self,max_workers = None,chunksize = 64):
+        """计算所有的组合，每算完一个工作单元就返回一批结果，结果的顺序和工作单元完成的顺序相同
+
+        Args:
+            max_workers (int, optional): 进程数，1表示在当前进程中计算，None表示使用所有的cpu. Defaults to None.
+            chunksize (int, optional): 每个工作单元中元件组合的数量. Defaults to 64.
+
+        Yields:
+            list: 结果的行，列名见BuckExplorer.header
+        """
+        chunks = self.iter_chunks(chunksize)
+        if(max_workers == 1):
+            _init_worker(self.mosfet_params)
+            for chunk in chunks:
+                yield _evaluate_chunk(chunk)
+            return
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_workers,initializer=_init_worker,initargs=(self.mosfet_params,)) as executor:
+            # 限制同时提交的工作单元数量，避免一次性把所有的组合都放进队列
+            max_pending = 2*max_workers
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_evaluate_chunk,chunk))
+                if(len(pending) >= max_pending):
+                    done,pending = wait(pending,return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    def run(self,path,max_workers = None,chunksize = 64):
+        """计算所有的组合，并把结果流式写入csv文件
+
+        Args:
+            path (str): csv文件的路径
+            max_workers (int, optional): 进程数，1表示在当前进程中计算，None表示使用所有的cpu. Defaults to None.
+            chunksize (int, optional): 每个工作单元中元件组合的数量. Defaults to 64.
+
+        Returns:
+            int: 写入的行数
+        """
+        cnt = 0
+        with open(path,'w',newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            for rows in self.iter_results(max_workers=max_workers,chunksize=chunksize):
+                writer.writerows(rows)
+                f.flush()
+                cnt += len(rows)
+        return cnt
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+# 默认的优化目标，max表示越大越好，min表示越小越好
+DEFAULT_OBJECTIVES = {
+    'efficiency':'max',
+    'volume':'min',
+    'area':'min',
+    'price':'min'
+}
+
+# 点数少于这个值的时候直接两两比较
+BRUTE_FORCE_SIZE = 64
+
+def _brute_force_dominated(A,B):
+    """B中被A中的某个点弱支配（所有维度都小于等于）的点，两两比较
+
+    Returns:
+        np.ndarray: 长度为len(B)的bool数组
+    """
+    return np.any(np.all(A[:,None,:] <= B[None,:,:],axis=2),axis=0)
+
+def _weakly_dominated(A,B):
+    """B中被A中的某个点弱支配（所有维度都小于等于）的点。
+    按第一个维度的排名分成两半（相等的时候A排在B的前面），低的一半和高的一半各自递归，
+    低的一半的A和高的一半的B在第一个维度上一定满足小于等于，只需要比较剩下的维度。
+    剩两个维度时按第一个维度排序之后用累积最小值一次求出，复杂度为O(Nlog^(d-1)N)
+
+    Args:
+        A (np.ndarray): M*d
+        B (np.ndarray): N*d
+
+    Returns:
+        np.ndarray: 长度为N的bool数组
+    """
+    n_a,n_b = len(A),len(B)
+    d = B.shape[1]
+    if(n_a == 0 or n_b == 0):
+        return np.zeros(n_b,dtype=bool)
+    if(d == 0):
+        return np.ones(n_b,dtype=bool)
+    if(d == 1):
+        return B[:,0] >= A[:,0].min()
+    if(n_a*n_b <= BRUTE_FORCE_SIZE*BRUTE_FORCE_SIZE):
+        return _brute_force_dominated(A,B)
+    # 相等的时候A排在前面，A在B前面等价于在这个维度上小于等于
+    order = np.lexsort((np.repeat([0,1],[n_a,n_b]),np.concatenate((A[:,0],B[:,0]))))
+    if(d == 2):
+        second = np.concatenate((A[:,1],np.full(n_b,np.inf)))[order]
+        prev_min = np.minimum.accumulate(second)
+        is_b = order >= n_a
+        result = np.zeros(n_b,dtype=bool)
+        b_idx = order[is_b]-n_a
+        result[b_idx] = prev_min[is_b] <= B[b_idx,1]
+        return result
+    rank = np.empty(n_a+n_b,dtype=np.int64)
+    rank[order] = np.arange(n_a+n_b)
+    half = (n_a+n_b)//2
+    a_low = rank[:n_a] < half
+    b_low = rank[n_a:] < half
+    result = np.zeros(n_b,dtype=bool)
+    result[b_low] = _weakly_dominated(A[a_low],B[b_low])
+    B_high = B[~b_low]
+    result[~b_low] = _weakly_dominated(A[~a_low],B_high) | _weakly_dominated(A[a_low][:,1:],B_high[:,1:])
+    return result
+
+def _nondominated_sorted(points):
+    """已经按字典序排序并去重的点中的非支配解。排在后面的点不可能支配前面的点，
+    分成前后两半各自求前沿，再删除后一半中被前一半支配的点（第一个维度已经满足小于等于）
+
+    Args:
+        points (np.ndarray): N*d
+
+    Returns:
+        np.ndarray: 长度为N的bool数组
+    """
+    n = len(points)
+    if(n <= BRUTE_FORCE_SIZE):
+        weak = np.all(points[:,None,:] <= points[None,:,:],axis=2)
+        np.fill_diagonal(weak,False)
+        return ~np.any(weak,axis=0)
+    half = n//2
+    mask_low = _nondominated_sorted(points[:half])
+    mask_high = _nondominated_sorted(points[half:])
+    high = np.flatnonzero(mask_high)
+    mask_high[high] = ~_weakly_dominated(points[:half][mask_low][:,1:],points[half:][high][:,1:])
+    return np.concatenate((mask_low,mask_high))
+
+def _row_keys(costs):
+    # 每一行作为一个整体比较，+0.0把-0.0变为0.0
+    costs = np.ascontiguousarray(costs+0.0)
+    return costs.view(np.dtype((np.void,costs.dtype.itemsize*costs.shape[1]))).ravel()
+
+def pareto_mask(costs):
+    """计算非支配解，所有的目标都是越小越好。
+    先对所有的点去重并按字典序排序，字典序中只有排在前面的点才可能支配后面的点。
+    两个目标时只需要和前面所有点的最小值比较，复杂度为O(NlogN)；
+    更多目标时用Kung的分治算法，复杂度为O(Nlog^(d-1)N)，见_weakly_dominated
+
+    Args:
+        costs (np.ndarray): N*d的数组，每一行是一个点
+
+    Returns:
+        np.ndarray: 长度为N的bool数组，True表示非支配解。含有NaN的点不会出现在前沿中，相同的点会同时保留
+    """
+    costs = np.asarray(costs,dtype=float)
+    n,d = costs.shape
+    mask = np.zeros(n,dtype=bool)
+    valid = np.flatnonzero(~np.isnan(costs).any(axis=1))
+    if(len(valid) == 0):
+        return mask
+    # 按字典序排序并去重
+    order = valid[np.lexsort(costs[valid].T[::-1])]
+    costs_sorted = costs[order]
+    is_first = np.concatenate(([True],np.any(costs_sorted[1:] != costs_sorted[:-1],axis=1)))
+    unique = costs_sorted[is_first]
+    group = np.cumsum(is_first)-1
+
+    unique_mask = np.zeros(len(unique),dtype=bool)
+    if(d == 1):
+        unique_mask[0] = True
+    elif(d == 2):
+        prev_min = np.minimum.accumulate(np.concatenate(([np.inf],unique[:-1,1])))
+        unique_mask = unique[:,1] < prev_min
+    else:
+        unique_mask = _nondominated_sorted(unique)
+    mask[order] = unique_mask[group]
+    return mask
+
+def _merge_masks(front,costs):
+    """把新的点合并到已有的前沿中，只需要新的点之间求前沿，再和已有的前沿互相比较，已有的前沿不需要重新计算
+
+    Args:
+        front (np.ndarray): 已有的前沿，M*d，其中没有互相支配的点
+        costs (np.ndarray): 新的点，N*d
+
+    Returns:
+        tuple: (长度为M的bool数组，长度为N的bool数组)，True表示合并之后仍在前沿中
+    """
+    front = np.asarray(front,dtype=float)
+    costs = np.asarray(costs,dtype=float)
+    new_mask = pareto_mask(costs)
+    new_idx = np.flatnonzero(new_mask)
+    new = costs[new_idx]
+    # 前沿中没有互相支配的点，所以和前沿中某个点相同的点不会被前沿中的其他点支配
+    front_keys,new_keys = _row_keys(front),_row_keys(new)
+    new_mask[new_idx] = ~(_weakly_dominated(front,new) & ~np.isin(new_keys,front_keys))
+    front_mask = ~(_weakly_dominated(new,front) & ~np.isin(front_keys,new_keys))
+    return front_mask,new_mask
+
+def _costs(data:pd.DataFrame,objectives):
+    costs = np.column_stack([data[key].to_numpy(dtype=float) for key in objectives.keys()])
+    sign = np.array([-1 if sense == 'max' else 1 for sense in objectives.values()])
+    return costs*sign
+
+def pareto_front(data:pd.DataFrame,objectives = DEFAULT_OBJECTIVES):
+    """获取扫描结果中的Pareto前沿
+
+    Args:
+        data (pd.DataFrame): 扫描的结果，比如BuckExplorer输出的csv
+        objectives (dict, optional): {列名:'max'|'min'}. Defaults to DEFAULT_OBJECTIVES.
+
+    Returns:
+        pd.DataFrame: 前沿上的行
+    """
+    return data[pareto_mask(_costs(data,objectives))]
+
+class ParetoFront():
+    """可以增量插入的Pareto前沿，扫描的结果可以边算边插入，只保留前沿上的行
+
+    >>> front = ParetoFront(columns = BuckExplorer.header)
+    >>> for rows in explorer.iter_results():
+    ...     front.insert(rows)
+    >>> front.data
+    """
+
+    def __init__(self,objectives = DEFAULT_OBJECTIVES,columns = None) -> None:
+        """
+        Args:
+            objectives (dict, optional): {列名:'max'|'min'}. Defaults to DEFAULT_OBJECTIVES.
+            columns (list, optional): 插入list形式的结果时使用的列名. Defaults to None.
+        """
+        self.objectives = dict(objectives)
+        self.columns = columns
+        self._data = None
+
+    def insert(self,rows):
+        """插入新的结果，新的结果之间求前沿之后再和已有的前沿互相比较，见_merge_masks
+
+        Args:
+            rows (pd.DataFrame|list): 新的结果，list的时候每一行的列名为self.columns
+
+        Returns:
+            ParetoFront: self
+        """
+        if(not isinstance(rows,pd.DataFrame)):
+            rows = pd.DataFrame(rows,columns=self.columns)
+        if(len(rows) == 0):
+            return self
+        if(self._data is None):
+            self._data = rows[pareto_mask(_costs(rows,self.objectives))].reset_index(drop=True)
+            return self
+        front_mask,new_mask = _merge_masks(_costs(self._data,self.objectives),_costs(rows,self.objectives))
+        self._data = pd.concat((self._data[front_mask],rows[new_mask]),ignore_index=True)
+        return self
+
+    @classmethod
+    def from_csv(cls,path,objectives = DEFAULT_OBJECTIVES,chunksize = 100000):
+        """分块读取csv文件并计算前沿，不需要把整个文件读入内存
+
+        Args:
+            path (str): csv文件的路径
+            objectives (dict, optional): {列名:'max'|'min'}. Defaults to DEFAULT_OBJECTIVES.
+            chunksize (int, optional): 每次读取的行数. Defaults to 100000.
+
+        Returns:
+            ParetoFront: 前沿
+        """
+        front = cls(objectives)
+        for chunk in pd.read_csv(path,chunksize=chunksize):
+            front.insert(chunk)
+        return front
+
+    @property
+    def data(self):
+        """前沿上的所有行
+
+        Returns:
+            pd.DataFrame: 前沿
+        """
+        if(self._data is None):
+            return pd.DataFrame(columns=self.columns)
+        return self._data
+
+    def __len__(self):
+        return 0 if self._data is None else len(self._data)
@@ -6,21 +6,30 @@ from numpy import floor
 from power_toys.components.inductor.coilcraft import Coilcraft
 from power_toys.components.inductor.base_inductor import BaseInductor
 from ..components.mosfet.base_mosfet import MOSFET
+from ..components.mosfet.catalog import MOSFETCatalog
 from ..common.const import *
-from ..components.Base import BaseComponent,BaseCircuit
+from ..components.Base import BaseComponent,BaseCircuit,as_param
 import copy
 
 class BUCK(BaseCircuit):
     def __init__(self,vin = None,vo = None,q_active:MOSFET = None,q_passive:MOSFET = None,ind:BaseInductor = None,fs = None,po = None,Ncell = 1) -> None:
+        """vin,vo,po,fs,Ncell既可以是标量，也可以是可以相互广播的numpy数组。
+        使用数组时为批量模式，所有的电路参数以及损耗都按数组返回，例如
+
+        >>> fs = np.linspace(100e3,1e6,1000)
+        >>> Ncell = np.array([1,2,4])[:,None]
+        >>> BUCK(48,12,mos1,mos2,ind,fs,100,Ncell).efficiency.shape
+        (3, 1000)
+        """
         super().__init__()
-        self.vin = vin
-        self.vo = vo
-        self._fs = fs
-        self.po = po
-        self.Ncell = Ncell
+        self.vin = as_param(vin)
+        self.vo = as_param(vo)
+        self._fs = as_param(fs)
+        self.po = as_param(po)
+        self.Ncell = as_param(Ncell)
         
-        self.register_component(q_active,BUCK_COMPONENT.ACTIVE_MOS,quantity=Ncell)
-        self.register_component(q_passive,BUCK_COMPONENT.PASSIVE_MOS,quantity=Ncell)
+        self.register_component(q_active,BUCK_COMPONENT.ACTIVE_MOS,quantity=self.Ncell)
+        self.register_component(q_passive,BUCK_COMPONENT.PASSIVE_MOS,quantity=self.Ncell)
         self.register_component(ind,BUCK_COMPONENT.INDUCTOR)
 
     @property
@@ -133,7 +142,29 @@ class BUCK(BaseCircuit):
             return self._fs
         
     def set_fs(self,val):
-        self._fs = val
+        self._fs = as_param(val)
+
+    def rank_mosfet(self,top_k = 10,catalog:MOSFETCatalog = None):
+        """在当前工作点下，一次算出catalog中所有mos分别作为主动管和整流管的损耗，返回损耗最小的top_k个。
+        mos的损耗按Ncell个计算，工作点需要是标量
+
+        >>> active,passive = buck.rank_mosfet(top_k = 5)
+        >>> buck.register_component(MOSFETCatalog.default().get(active.id[0]),BUCK_COMPONENT.ACTIVE_MOS,quantity=buck.Ncell)
+
+        Args:
+            top_k (int, optional): 返回的数量. Defaults to 10.
+            catalog (MOSFETCatalog, optional): 候选的mos. Defaults to None，使用数据库中vbr>=1.3*vin/Ncell的mos.
+
+        Returns:
+            tuple: (主动管的排序,整流管的排序)，都是pd.DataFrame，见MOSFETCatalog.rank
+        """
+        if(np.ndim(self.vin/self.Ncell*self._fs*self.po) > 0):
+            log_error("rank_mosfet只支持标量的工作点")
+            return None
+        if(catalog is None):
+            catalog = MOSFETCatalog.default()
+            catalog = catalog[catalog.vbr >= 1.3*self.vin/self.Ncell]
+        return tuple(catalog.rank(self.operating_point(c_index),top_k=top_k,quantity=self.Ncell) for c_index in [BUCK_COMPONENT.ACTIVE_MOS,BUCK_COMPONENT.PASSIVE_MOS])
 
     @property
     def optimize_eff_by_rdson(self):
@@ -158,12 +189,14 @@ class BUCK(BaseCircuit):
         d = a + (b - a) / phi
         cnt_iter = 0
         while abs(b - a) > 1e-6:
-            buck1 = copy.deepcopy(self)
-            buck1.set_fs(c)
-            buck2 = copy.deepcopy(self)
-            buck2.set_fs(d)
+            # 使用variant临时修改fs，不需要每次迭代都拷贝电路
+            fs_opt = c
+            with self.variant(fs = c):
+                loss1 = self.total_loss
+            with self.variant(fs = d):
+                loss2 = self.total_loss
 
-            if buck1.total_loss < buck2.total_loss:
+            if loss1 < loss2:
                 b = d
             else:
                 a = c
@@ -173,7 +206,9 @@ class BUCK(BaseCircuit):
             if(cnt_iter > max_iter):
                 print(f"{max_iter}次迭代后，不收敛")
                 return (b + a) / 2
-        return buck1
+        buck_opt = copy.deepcopy(self)
+        buck_opt.set_fs(fs_opt)
+        return buck_opt
 
     @property
     def optimize_eff_by_same_rdson(self):
@@ -185,22 +220,17 @@ class BUCK(BaseCircuit):
         d = a + (b - a) / phi
         cnt_iter = 0
         while abs(b - a) > 1e-6:
-            mos1_opt = mos.mos_in_series(c)
-            mos2_opt = mos.mos_in_series(c)
-
-            buck1 = copy.deepcopy(self)
-            buck1.register_component(mos1_opt,BUCK_COMPONENT.ACTIVE_MOS)
-            buck1.register_component(mos2_opt,BUCK_COMPONENT.PASSIVE_MOS)
-
-            mos3_opt = mos.mos_in_series(d)
-            mos4_opt = mos.mos_in_series(d)
+            rdson_opt = c
+            with self.variant():
+                self.register_component(mos.mos_in_series(c),BUCK_COMPONENT.ACTIVE_MOS)
+                self.register_component(mos.mos_in_series(c),BUCK_COMPONENT.PASSIVE_MOS)
+                mos1_loss = self.total_loss
 
-            buck2 = copy.deepcopy(self)
-            buck2.register_component(mos3_opt,BUCK_COMPONENT.ACTIVE_MOS)
-            buck2.register_component(mos4_opt,BUCK_COMPONENT.PASSIVE_MOS)
+            with self.variant():
+                self.register_component(mos.mos_in_series(d),BUCK_COMPONENT.ACTIVE_MOS)
+                self.register_component(mos.mos_in_series(d),BUCK_COMPONENT.PASSIVE_MOS)
+                mos2_loss = self.total_loss
 
-            mos1_loss = buck1.total_loss
-            mos2_loss = buck2.total_loss
             if mos1_loss < mos2_loss:
                 b = d
             else:
@@ -210,7 +240,10 @@ class BUCK(BaseCircuit):
             cnt_iter+=1
             if(cnt_iter > MAX_ITER_NUM):
                 break
-        return buck1
+        buck_opt = copy.deepcopy(self)
+        buck_opt.register_component(mos.mos_in_series(rdson_opt),BUCK_COMPONENT.ACTIVE_MOS)
+        buck_opt.register_component(mos.mos_in_series(rdson_opt),BUCK_COMPONENT.PASSIVE_MOS)
+        return buck_opt
     
     @property
     def mos1(self)->MOSFET:
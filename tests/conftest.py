@@ -0,0 +1,23 @@
+import os
+import sys
+import shutil
+import pytest
+sys.path.insert(0,'.')
+
+from power_toys.data import database
+
+@pytest.fixture(autouse=True,scope='session')
+def component_db(tmp_path_factory):
+    """测试使用数据库的临时拷贝，不修改power_toys/component.db，子进程通过环境变量使用同一个拷贝
+    """
+    db_file = tmp_path_factory.mktemp('db')/'component.db'
+    shutil.copy('power_toys/component.db',db_file)
+    old = os.environ.get(database.ENV_DB_FILE)
+    os.environ[database.ENV_DB_FILE] = str(db_file)
+    database.configure()
+    yield db_file
+    database.dispose()
+    if(old is None):
+        os.environ.pop(database.ENV_DB_FILE,None)
+    else:
+        os.environ[database.ENV_DB_FILE] = old
@@ -0,0 +1,192 @@
+import pytest
+import sys
+import numpy as np
+sys.path.insert(0,'.')
+
+from power_toys.components.inductor.coilcraft import Coilcraft,model_registry
+
+def test_model_registry():
+    model_registry.clear()
+    ind = Coilcraft(id='XGL6060-103')
+    loss = ind.predict_AI(5,3,500e3)
+    assert model_registry.info['misses'] == 1
+    # 同型号的新实例不会再从硬盘载入模型
+    assert all(Coilcraft(id='XGL6060-103').predict_AI(5,3,500e3) == loss)
+    assert model_registry.info['misses'] == 1
+    assert model_registry.info['hits'] == 1
+
+    maxsize = model_registry.maxsize
+    model_registry.maxsize = 1
+    Coilcraft(id='XGL6060-153').predict_AI(5,3,500e3)
+    assert 'XGL6060-103' not in model_registry
+    assert len(model_registry) == 1
+    model_registry.maxsize = maxsize
+
+def test_predict_AI_batch():
+    import numpy as np
+    ind = Coilcraft(id='XGL6060-103')
+    dc = np.array([2,5,8])
+    ac = np.array([1,3,2])
+    freq = np.array([200e3,500e3,1e6])
+    result = ind.predict_AI_batch(dc,ac,freq)
+    assert result.shape == (3,3)
+    # 和torch的模型逐行预测的结果比较
+    from power_toys.components.inductor.coilcraft import _load_torch_model
+    net = _load_torch_model('XGL6060-103')
+    for i in range(3):
+        assert result[i] == pytest.approx(net.predict(np.array([[dc[i],ac[i],freq[i]/1e6]]))[0],rel=1e-5)
+
+def test_predict_on_circuit_shared(monkeypatch):
+    from power_toys.components.mosfet.base_mosfet import MOSFET
+    from power_toys.topology.buck import BUCK
+    ind = Coilcraft(id='XGL6060-103')
+    buck = BUCK(vin=48,vo=12,Ncell = 2,q_active=MOSFET.load_from_lib("BSC030N08NS5"),q_passive=MOSFET.load_from_lib("BSC030N08NS5"),ind=ind,fs = 500e3,po = 50)
+    net = ind.AI_model
+    calls = []
+    predict = net.predict
+    def counting_predict(x):
+        calls.append(len(x))
+        return predict(x)
+    monkeypatch.setattr(net,'predict',counting_predict)
+    # loss_dc,loss_ac和temperature在同一个工作点只做一次推理
+    ind.loss_dc,ind.loss_ac,ind.temperature
+    buck.total_loss
+    assert calls == [1]
+    buck.set_fs(600e3)
+    ind.loss_dc,ind.loss_ac,ind.temperature
+    assert calls == [1,1]
+
+def test_coilcraft_catalog(tmp_path,monkeypatch):
+    import json
+    from power_toys.components.inductor import catalog as catalog_module
+    from power_toys.components.inductor.catalog import CoilcraftCatalog
+    monkeypatch.setattr(catalog_module,'INDEX_FILE',str(tmp_path/'index.npz'))
+    catalog = CoilcraftCatalog.load()
+    assert (tmp_path/'index.npz').exists()
+    # 第二次从保存的索引中载入
+    loaded = CoilcraftCatalog.load()
+    assert (loaded.ids == catalog.ids).all() and (loaded.L == catalog.L).all()
+    # 写了一半的索引重新生成
+    with open(tmp_path/'index.npz','r+b') as f:
+        f.truncate(100)
+    assert (CoilcraftCatalog.load().ids == catalog.ids).all()
+    assert (CoilcraftCatalog.load().ids == catalog.ids).all() and [path.name for path in tmp_path.iterdir()] == ['index.npz']
+
+    selected = catalog.select(series='xal5030',inductance_min=1e-6,inductance_max=5e-6)
+    assert len(selected) > 0
+    assert all(selected.series == 'XAL5030')
+    assert all(np.diff(selected.inductance) >= 0)
+    for _id in selected.ids:
+        with open(f"power_toys/data/coilcraft_model/{_id}.txt") as f:
+            model = json.load(f)
+        ind = Coilcraft(str(_id))
+        assert ind.inductance == model['L']*1e-6
+        assert ind.isat == model['Isat'] and ind.dcr == model['DCRTyp']
+        assert ind._model is None
+    assert Coilcraft.id_from_inductance(selected.inductance[0],'XAL5030') == selected.ids[0]
+
+def test_loss_store(tmp_path):
+    from power_toys.data.loss_store import LossStore,convert,LOSS_COLUMNS
+    source = 'power_toys/data/coilcraft_loss_for_training'
+    ids = ['XAL5030-122','XGL6060-103']
+    for _id in ids:
+        (tmp_path/f"{_id}.txt").write_text(open(f"{source}/{_id}.txt").read())
+    path = str(tmp_path/'loss.snap')
+    convert(str(tmp_path),path,LOSS_COLUMNS)
+    store = LossStore(path)
+    assert store.ids == ids
+    for _id in ids:
+        data = np.loadtxt(f"{source}/{_id}.txt",delimiter=',')
+        assert isinstance(store[_id],np.memmap)
+        assert (store[_id] == data).all()
+        assert (store.features(_id) == data[:,:3]).all() and (store.column(_id,'temp') == data[:,5]).all()
+
+def test_predict_loss_batch(tmp_path,monkeypatch):
+    from power_toys.components.inductor import coilcraft
+    monkeypatch.setattr(coilcraft,'INTERPOLATOR_DIR',str(tmp_path))
+    coilcraft.interpolator_registry.clear()
+    ind = Coilcraft(id='XGL6060-103')
+    dc = np.array([5,2,3])
+    ac = np.array([3,1,2])
+    freq = np.array([500e3,1e6,1.5e6])
+    result = ind.predict_loss(dc,ac,freq)
+    assert result.shape == (3,2)
+    assert (tmp_path/'XGL6060-103.pkl').exists()
+    # 第二次从硬盘载入三角剖分
+    coilcraft.interpolator_registry.clear()
+    for i in range(3):
+        assert np.array_equal(ind.predict_loss(dc[i],ac[i],freq[i]),result[i])
+    coilcraft.interpolator_registry.clear()
+
+def test_numpy_backend(tmp_path):
+    import subprocess
+    from power_toys.components.inductor.coilcraft import _load_torch_model
+    from power_toys.ml_model.numpy_net import NumpyMLP
+    x = np.array([[2,1,0.2],[5,3,0.5],[8,2,1.0]])
+    net = _load_torch_model('XGL6060-103')
+    path = str(tmp_path/'XGL6060-103.npz')
+    net.export(path)
+    numpy_net = NumpyMLP.load(path)
+    assert numpy_net.predict(x) == pytest.approx(net.predict(x),rel=1e-4)
+    # 使用导出的npz时不会import torch
+    code = "import sys;from power_toys.components.inductor.coilcraft import Coilcraft;Coilcraft('XGL6060-103').predict_AI(5,3,500e3);print('torch' in sys.modules)"
+    assert subprocess.run([sys.executable,'-c',code],capture_output=True,check=True,text=True).stdout.strip() == 'False'
+
+def test_catalog_predict_AI():
+    from power_toys.components.inductor.catalog import CoilcraftCatalog
+    catalog = CoilcraftCatalog.default().select(series='XGL6060')
+    dc = np.array([2,5])
+    ac = np.array([1,3])
+    freq = np.array([200e3,500e3])
+    result = catalog.predict_AI(dc,ac,freq)
+    assert result.shape == (len(catalog),2,3)
+    for i,_id in enumerate(catalog.ids):
+        assert result[i] == pytest.approx(Coilcraft(str(_id)).predict_AI_batch(dc,ac,freq),rel=1e-6)
+    ranking = catalog.rank(5,3,500e3,top_k=3)
+    assert len(ranking) == 3 and ranking['total_loss'].is_monotonic_increasing
+    assert catalog.rank(dc,3,500e3) is None
+
+def test_get_loss_cache(tmp_path,monkeypatch):
+    import threading
+    from power_toys.components.inductor.coilcraft_server import CoilcraftServer
+    monkeypatch.setenv('POWER_TOYS_COILCRAFT_CACHE',str(tmp_path))
+    ind = Coilcraft(id='XGL6060-103')
+    with CoilcraftServer() as server:
+        monkeypatch.setenv('POWER_TOYS_COILCRAFT_URL',server.url)
+        ripple,ac_loss,dc_loss,temp = ind.get_loss_by_ripple(5,1,3,500e3)
+        assert len(ripple) == 11 and ripple[0] == 1 and ripple[-1] == 3
+        assert [dc_loss[-1],ac_loss[-1],temp[-1]] == pytest.approx(ind.predict_AI(5,3,500e3),rel=1e-6)
+        # 同样的请求使用缓存
+        assert ind.get_loss_by_ripple(5,1,3,500e3)[1] == pytest.approx(ac_loss)
+        assert server.requests == 1
+        # 同时发出的同样的请求只发送一次
+        threads = [threading.Thread(target=ind.get_loss_by_frequency,args=(5,3,100e3,1e6)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert server.requests == 2
+    # 缓存按接口地址区分，其他地址不使用这个接口生成的响应
+    with CoilcraftServer() as server:
+        monkeypatch.setenv('POWER_TOYS_COILCRAFT_URL',server.url)
+        ind.get_loss_by_ripple(5,1,3,500e3)
+        assert server.requests == 1
+
+def test_loss_source_switch(tmp_path,monkeypatch):
+    from power_toys.components.inductor import coilcraft
+    from power_toys.components.mosfet.base_mosfet import MOSFET
+    from power_toys.topology.buck import BUCK
+    monkeypatch.setattr(coilcraft,'INTERPOLATOR_DIR',str(tmp_path))
+    def get_ind(loss_source):
+        ind = Coilcraft(id='XGL6060-103')
+        ind.loss_source = loss_source
+        BUCK(vin=48,vo=12,Ncell = 2,q_active=MOSFET.load_from_lib("BSC030N08NS5"),q_passive=MOSFET.load_from_lib("BSC030N08NS5"),ind=ind,fs = 500e3,po = 50)
+        return ind
+    ind = get_ind('AI')
+    loss_AI = [ind.loss_dc,ind.loss_ac]
+    # 切换loss_source之后不使用之前的缓存
+    ind.loss_source = 'table'
+    loss_table = [ind.loss_dc,ind.loss_ac]
+    assert loss_table == pytest.approx([get_ind('table').loss_dc,get_ind('table').loss_ac])
+    assert loss_table != pytest.approx(loss_AI)
+    coilcraft.interpolator_registry.clear()
@@ -0,0 +1,90 @@
+import pytest
+import sys
+import shutil
+import subprocess
+sys.path.insert(0,'.')
+
+from power_toys.data import database
+from power_toys.components.mosfet.base_mosfet import MOSFET
+
+def test_lazy_engine():
+    code = "import power_toys.components.mosfet.base_mosfet;from power_toys.data import database;assert database._state['engine'] is None"
+    subprocess.run([sys.executable,'-c',code],check=True,stdin=subprocess.DEVNULL)
+
+def test_read_only(tmp_path):
+    db_file = tmp_path/'component db.db'
+    shutil.copy('power_toys/component.db',db_file)
+    try:
+        database.configure(str(db_file),read_only = True)
+        assert 'immutable=1' in database.get_url()
+        mos = MOSFET.load_from_lib('BSC030N08NS5')
+        assert mos.rdson == pytest.approx(2.6e-3)
+        mos.rdson = 1e-3
+        with pytest.raises(Exception):
+            mos.save_to_db()
+    finally:
+        database.configure()
+
+def test_wal_opt_in(tmp_path):
+    import sqlite3
+    db_file = tmp_path/'component.db'
+    shutil.copy('power_toys/component.db',db_file)
+    def journal_mode():
+        with sqlite3.connect(db_file) as connection:
+            return connection.execute("PRAGMA journal_mode").fetchone()[0]
+    try:
+        database.configure(str(db_file))
+        MOSFET.load_from_lib('BSC030N08NS5')
+        database.dispose()
+        assert journal_mode() == 'delete'
+        database.configure(str(db_file),wal = True)
+        MOSFET.load_from_lib('BSC030N08NS5')
+        database.dispose()
+        assert journal_mode() == 'wal'
+    finally:
+        database.configure()
+
+def test_concurrent_sessions():
+    from concurrent.futures import ThreadPoolExecutor
+    def load(_id):
+        mos = MOSFET.load_from_lib(_id)
+        return id(database.get_session()()),mos.rdson,len(MOSFET.list_all_model(MOSFET.vbr >= 80))
+    ids = ['BSC030N08NS5','IQE008N03LM5']*8
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        results = list(executor.map(load,ids))
+    assert len(set([session for session,_,_ in results])) > 1
+    assert [rdson for _,rdson,_ in results] == [MOSFET.load_from_lib(_id).rdson for _id in ids]
+    assert len(set([count for _,_,count in results])) == 1
+
+def test_snapshot(tmp_path):
+    import json
+    import numpy as np
+    from power_toys.data import snapshot
+    from power_toys.components.mosfet.catalog import MOSFETCatalog
+    from power_toys.components.inductor.coilcraft import Coilcraft
+    path = str(tmp_path/'catalog.snap')
+    snapshot.export_snapshot(path)
+    try:
+        snapshot.use(path)
+        catalog = MOSFETCatalog.default()
+        assert isinstance(catalog.data,np.memmap)
+        assert str(catalog.get('BSC030N08NS5')) == str(MOSFET.load_from_lib('BSC030N08NS5'))
+        with open('power_toys/data/coilcraft_model/XAL5020-122.txt') as f:
+            assert Coilcraft('XAL5020-122').model == json.load(f)
+        columns,table = snapshot.active().fea_table('Bmax_500kHz_k2.csv')
+        assert columns[0] == 'Freq [kHz]' and table[0,0] == 500
+        columns,table = snapshot.active().core_fea_table('Core_Loss/DMR51W/1.0Mhz_k2.csv')
+        assert columns[-1] == 'All_Core_Total_Loss' and table[0,-1] == pytest.approx(0.919257)
+        # 写入数据库之后不再使用快照中过期的MOSFET表
+        db_file = tmp_path/'component.db'
+        shutil.copy('power_toys/component.db',db_file)
+        database.configure(str(db_file))
+        mos = MOSFET.load_from_lib('BSC030N08NS5')
+        mos.rdson = 1e-3
+        mos.save_to_db()
+        catalog = MOSFETCatalog.default()
+        assert not isinstance(catalog.data,np.memmap)
+        assert catalog.get('BSC030N08NS5').rdson == pytest.approx(1e-3)
+    finally:
+        snapshot.use(None)
+        database.configure()
@@ -0,0 +1,113 @@
+import pytest
+import sys
+sys.path.insert(0,'.')
+
+from power_toys.components.mosfet.base_mosfet import MOSFET
+from power_toys.components.mosfet.catalog import MOSFETCatalog
+from power_toys.components.inductor.base_inductor import BaseInductor
+from power_toys.topology.buck import BUCK
+from power_toys.common.const import BUCK_COMPONENT
+
+def get_buck():
+    mos1 = MOSFET.load_from_lib("BSC030N08NS5")
+    mos2 = MOSFET.load_from_lib("IQE008N03LM5")
+    ind = BaseInductor()
+    ind.inductance = 10e-6
+    return BUCK(vin=48,vo=12,Ncell = 2,q_active=mos1,q_passive=mos2,ind=ind,fs = 100e3,po = 110)
+
+def test_opt_rdson():
+    buck = get_buck()
+    for mos in [buck.mos1,buck.mos2]:
+        assert mos.opt_rdson == pytest.approx(mos._opt_rdson_iterative(),rel=1e-3)
+        rdson_opt = mos.opt_rdson
+        assert mos.mos_in_series(rdson_opt).total_loss <= mos.mos_in_series(rdson_opt*1.01).total_loss
+        assert mos.mos_in_series(rdson_opt).total_loss <= mos.mos_in_series(rdson_opt*0.99).total_loss
+
+def test_opt_rdson_batch():
+    import numpy as np
+    mos1 = MOSFET.load_from_lib("BSC030N08NS5")
+    mos2 = MOSFET.load_from_lib("IQE008N03LM5")
+    ind = BaseInductor()
+    ind.inductance = 10e-6
+    fs = np.array([100e3,300e3])
+    buck = BUCK(vin=48,vo=12,Ncell = 2,q_active=mos1,q_passive=mos2,ind=ind,fs = fs,po = 110)
+    rdson_opt = buck.mos1.opt_rdson
+    assert rdson_opt.shape == (2,)
+    for i in range(2):
+        buck_scalar = BUCK(vin=48,vo=12,Ncell = 2,q_active=mos1,q_passive=mos2,ind=ind,fs = fs[i],po = 110)
+        assert rdson_opt[i] == pytest.approx(buck_scalar.mos1.opt_rdson)
+
+def test_opt_rdson_all():
+    buck = get_buck()
+    result = MOSFET.opt_rdson_all(**buck.mos1.operating_point)
+    row = result[result.id == buck.mos1.id].iloc[0]
+    assert row.rdson_opt == pytest.approx(buck.mos1.opt_rdson)
+    assert row.loss_min == pytest.approx(buck.mos1.mos_in_series(row.rdson_opt).total_loss)
+    assert result.loss_min.is_monotonic_increasing
+
+    result = MOSFET.opt_rdson_all(**buck.mos1.operating_point,condition = MOSFET.vbr>=80)
+    assert len(result) == len(MOSFET.list_all_model(MOSFET.vbr>=80))
+
+def test_mosfet_catalog():
+    catalog = MOSFETCatalog.default()
+    assert catalog is MOSFETCatalog.default()
+    selected = catalog[catalog.vbr >= 1.3*48/2].sort('vbr','rdson')
+    expected = MOSFET.list_all_model(MOSFET.vbr >= 1.3*48/2)
+    assert len(selected) == len(expected)
+    assert all(selected.vbr[:-1] <= selected.vbr[1:])
+    mos = catalog.get('BSC030N08NS5')
+    assert str(mos) == str(MOSFET.load_from_lib('BSC030N08NS5'))
+    assert catalog.get('NOT_EXIST') is None
+
+def test_rank_mosfet():
+    buck = get_buck()
+    active,passive = buck.rank_mosfet(top_k = 3)
+    assert len(active) == 3 and len(passive) == 3
+    assert all(active.total_loss.diff().dropna() >= 0)
+    catalog = MOSFETCatalog.default()
+    mos = catalog.get(passive.id[0])
+    buck.register_component(mos,BUCK_COMPONENT.PASSIVE_MOS,quantity = buck.Ncell)
+    assert buck.loss_sum_on_component(mos) == pytest.approx(passive.total_loss[0])
+
+def test_migrate_schema(tmp_path):
+    import shutil
+    from sqlalchemy import create_engine,text
+    db_file = tmp_path/'component.db'
+    shutil.copy('power_toys/component.db',db_file)
+    engine = create_engine(f"sqlite:///{db_file}")
+    MOSFET.migrate_schema(engine)
+    MOSFET.migrate_schema(engine)
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT id,fom FROM MOSFET WHERE vbr = 80 AND fom IS NOT NULL ORDER BY fom LIMIT 1")).fetchone()
+        plan = connection.execute(text("EXPLAIN QUERY PLAN SELECT * FROM MOSFET WHERE vbr = 80 AND fom IS NOT NULL ORDER BY fom LIMIT 1")).fetchall()
+    assert 'ix_mosfet_vbr_fom' in str(plan)
+    best = MOSFET.rank_by_FoM(80,limit = 1)[0]
+    assert row[0] == best.id and row[1] == pytest.approx(best.FoM)
+
+def test_import_table(tmp_path):
+    import shutil
+    import pandas as pd
+    from sqlalchemy import create_engine,text
+    db_file = tmp_path/'component.db'
+    shutil.copy('power_toys/component.db',db_file)
+    engine = create_engine(f"sqlite:///{db_file}")
+    df = pd.read_sql_query("SELECT * FROM MOSFET",engine)
+    df.loc[df.ID == 'BSC030N08NS5','RDSON'] *= 2
+    df = pd.concat([df,pd.DataFrame({'ID':['NEW_MOS'],'RDSON':[1e-3],'VBR':[80]})])
+    df.to_csv(tmp_path/'mosfet.csv',index=False)
+
+    report = MOSFET.import_table(tmp_path/'mosfet.csv',engine = engine)
+    assert report.status.value_counts().to_dict() == {'identical':len(df)-2,'changed':1,'new':1}
+    assert list(report[report.status == 'changed'].changes)[0].keys() == {'rdson'}
+    report = MOSFET.import_table(df,overwrite = True,engine = engine)
+    assert report.written.sum() == 1
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT rdson FROM MOSFET WHERE id = 'BSC030N08NS5'")).scalar() == pytest.approx(5.2e-3)
+    assert (MOSFET.import_table(df,engine = engine).status == 'identical').all()
+
+def test_con_loss_without_ktemp():
+    buck = get_buck()
+    buck.mos1.ktemp = None
+    buck.mos1.thermal_temp = 80
+    # 参数不完整时由_con_loss报告错误，不抛出异常
+    assert buck.mos1.con_loss is None
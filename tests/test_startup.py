@@ -0,0 +1,16 @@
+import sys
+import json
+import subprocess
+
+# import power_toys.topology.buck的时间预算(s)，torch,pandas等依赖只在用到的时候才import
+STARTUP_BUDGET = 1.5
+HEAVY_MODULES = ['torch','scipy','pandas','matplotlib','requests','joblib','sklearn','pyaedt']
+
+def test_import_buck_budget():
+    code = "import sys,time,json;t = time.perf_counter();import power_toys.topology.buck;print(json.dumps([time.perf_counter()-t,list(sys.modules)]))"
+    # 取多次中最快的一次，减少机器负载的影响
+    results = [json.loads(subprocess.run([sys.executable,'-c',code],capture_output=True,check=True,text=True).stdout) for _ in range(3)]
+    elapsed = min([t for t,_ in results])
+    modules = results[0][1]
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+    assert elapsed < STARTUP_BUDGET
@@ -0,0 +1,70 @@
+import pytest
+import sys
+sys.path.insert(0,'.')
+import numpy as np
+import pandas as pd
+
+from power_toys.components.mosfet.base_mosfet import MOSFET
+from power_toys.components.inductor.coilcraft import Coilcraft
+from power_toys.topology.buck import BUCK
+from power_toys.sweep.explorer import BuckExplorer
+
+def test_buck_explorer(tmp_path):
+    explorer = BuckExplorer(48,12,110,
+                            q_active = MOSFET.list_all_model(MOSFET.id.in_(['BSC030N08NS5','BSZ070N08LS5'])),
+                            q_passive = ['IQE008N03LM5'],
+                            ind = ['XGL6060-103','XGL6060-153'],
+                            fs = [100e3,200e3],
+                            Ncell = [1,2])
+    path = tmp_path/'result.csv'
+    assert explorer.run(path,max_workers = 1,chunksize = 3) == explorer.n_combinations == 16
+
+    result = pd.read_csv(path)
+    assert list(result.columns) == BuckExplorer.header
+    row = result[(result.q_active == 'BSC030N08NS5') & (result.ind == 'XGL6060-103') & (result.fs == 200e3) & (result.Ncell == 2)].iloc[0]
+    buck = BUCK(48,12,MOSFET.load_from_lib('BSC030N08NS5'),MOSFET.load_from_lib('IQE008N03LM5'),Coilcraft('XGL6060-103'),200e3,110,2)
+    assert row.total_loss == pytest.approx(buck.total_loss,rel=1e-5)
+    assert row.efficiency == pytest.approx(buck.efficiency,rel=1e-5)
+
+def test_buck_explorer_processes(tmp_path):
+    explorer = BuckExplorer(48,12,110,
+                            q_active = ['BSC030N08NS5','BSZ070N08LS5'],
+                            q_passive = ['IQE008N03LM5'],
+                            ind = ['XGL6060-103','XGL6060-153'],
+                            fs = [100e3,200e3],
+                            Ncell = [1,2])
+    explorer.run(tmp_path/'serial.csv',max_workers = 1,chunksize = 1)
+    explorer.run(tmp_path/'parallel.csv',max_workers = 2,chunksize = 1)
+    keys = ['q_active','q_passive','ind','fs','Ncell']
+    serial = pd.read_csv(tmp_path/'serial.csv').sort_values(keys,ignore_index=True)
+    parallel = pd.read_csv(tmp_path/'parallel.csv').sort_values(keys,ignore_index=True)
+    pd.testing.assert_frame_equal(serial,parallel)
+
+def test_pareto():
+    from power_toys.sweep.pareto import pareto_mask,pareto_front,ParetoFront
+    rng = np.random.default_rng(0)
+    for d in [2,3,4]:
+        costs = rng.integers(0,5,size=(200,d)).astype(float)
+        mask = pareto_mask(costs)
+        for i in range(len(costs)):
+            dominated = np.any(np.all(costs <= costs[i],axis=1) & np.any(costs < costs[i],axis=1))
+            assert mask[i] == (not dominated)
+    # 分治的递归和两两比较的分界
+    costs = rng.random((1000,4))
+    costs[:,0] = -np.sum(costs[:,1:],axis=1)+0.1*costs[:,0]
+    mask = pareto_mask(costs)
+    for i in range(len(costs)):
+        assert mask[i] == (not np.any(np.all(costs <= costs[i],axis=1) & np.any(costs < costs[i],axis=1)))
+
+    data = pd.DataFrame({
+        'efficiency':rng.random(1000),
+        'volume':rng.random(1000),
+        'area':rng.random(1000),
+        'price':rng.random(1000)
+    })
+    front = ParetoFront()
+    for i in range(0,1000,100):
+        front.insert(data.iloc[i:i+100])
+    expected = pareto_front(data)
+    assert len(front) == len(expected)
+    assert set(front.data.efficiency) == set(expected.efficiency)